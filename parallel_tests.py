@@ -0,0 +1,198 @@
+"""
+Параллельный запуск тестов обоих проектов.
+
+Тесты каждого проекта делятся на части по числу потоков, и все части
+обоих проектов выполняются одновременно. Каждая часть работает со своей
+копией шаблонной БД: шаблон создаётся миграциями один раз и строится
+заново, только когда меняются файлы миграций или версия Django.
+
+Запуск из корня репозитория: python parallel_tests.py [--workers N]
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+PROJECTS = {
+    'ya_news': ('yanews.settings', 'YANEWS'),
+    'ya_note': ('yanote.settings', 'YANOTE'),
+}
+DB_DIR = '.test_db'
+# Опции из addopts (-vv, отключённый кеш) заменяются своими: вывод
+# частей разбирается построчно.
+PYTEST_ARGS = ('-o', 'addopts=', '-p', 'no:cacheprovider')
+
+
+def project_env(project, **paths):
+    settings_module, prefix = PROJECTS[project]
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    for name, path in paths.items():
+        env[f'{prefix}_{name}'] = str(path)
+    return env
+
+
+def run(project, args, env):
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT / project, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+
+
+def migrations_hash(project):
+    """Хеш файлов миграций проекта и версии Django."""
+    import django
+
+    digest = hashlib.sha256(django.get_version().encode())
+    for path in sorted((ROOT / project).glob('*/migrations/*.py')):
+        digest.update(str(path.relative_to(ROOT)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def template_db(project, rebuild=False):
+    """
+    Путь к шаблонной БД с применёнными миграциями.
+
+    Устаревшие шаблоны удаляются, новый собирается через временный файл,
+    чтобы прерванная сборка не оставила недоделанный шаблон.
+    """
+    db_dir = ROOT / project / DB_DIR
+    db_dir.mkdir(exist_ok=True)
+    template = db_dir / f'template-{migrations_hash(project)}.sqlite3'
+    if template.exists() and not rebuild:
+        return template, False
+    for stale in db_dir.glob('template-*'):
+        stale.unlink()
+    building = template.with_suffix('.tmp')
+    result = run(
+        project, ('manage.py', 'migrate', '--noinput'),
+        project_env(project, DB_PATH=building),
+    )
+    if result.returncode:
+        building.unlink(missing_ok=True)
+        raise RuntimeError(f'{project}: миграции не применились:\n'
+                           f'{result.stdout}')
+    building.rename(template)
+    return template, True
+
+
+def collect(project):
+    """Идентификаторы тестов проекта."""
+    result = run(
+        project, ('-m', 'pytest', *PYTEST_ARGS, '--collect-only', '-q'),
+        project_env(project),
+    )
+    if result.returncode:
+        raise RuntimeError(f'{project}: тесты не собрались:\n'
+                           f'{result.stdout}')
+    return [line for line in result.stdout.splitlines() if '::' in line]
+
+
+def shard(node_ids, count):
+    """
+    Делит тесты на count частей примерно поровну.
+
+    Класс TestCase целиком попадает в одну часть (setUpTestData
+    выполняется один раз), тесты-функции — вместе со своим модулем
+    (общие фикстуры уровня модуля).
+    """
+    groups = defaultdict(list)
+    for node_id in node_ids:
+        parts = node_id.split('::')
+        groups['::'.join(parts[:2] if len(parts) > 2 else parts[:1])].append(
+            node_id
+        )
+    shards = [[] for _ in range(count)]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return [tests for tests in shards if tests]
+
+
+def run_shard(project, number, tests, template):
+    database = template.with_name(f'worker-{number}.sqlite3')
+    shutil.copyfile(template, database)
+    started = time.monotonic()
+    result = run(
+        project,
+        ('-m', 'pytest', *PYTEST_ARGS, '-q', '--tb=short', '--reuse-db',
+         *tests),
+        project_env(project, TEST_DB=database),
+    )
+    database.unlink()
+    return project, number, result, started, time.monotonic()
+
+
+def prepare(project, workers, rebuild=False):
+    """Шаблонная БД и части тестов проекта."""
+    moment = time.monotonic()
+    template, built = template_db(project, rebuild)
+    action = 'собран' if built else 'взят из прошлого запуска'
+    print(f'{project}: шаблон БД {action} '
+          f'({time.monotonic() - moment:.1f} с)')
+    if workers == 1:
+        # Делить нечего: сбор тестов стоил бы лишнего запуска pytest.
+        return [(project, 1, (), template)]
+    return [
+        (project, number, tests, template)
+        for number, tests in enumerate(shard(collect(project), workers), 1)
+    ]
+
+
+def summary(output):
+    lines = output.strip().splitlines()
+    return lines[-1].strip('= ') if lines else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('projects', nargs='*', metavar='project',
+                        help=f'{", ".join(PROJECTS)}; по умолчанию — оба')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='число частей каждого проекта')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='пересобрать шаблонные БД')
+    options = parser.parse_args()
+    unknown = set(options.projects) - set(PROJECTS)
+    if unknown:
+        parser.error(f'неизвестные проекты: {", ".join(sorted(unknown))}')
+    started = time.monotonic()
+    projects = options.projects or list(PROJECTS)
+    with ThreadPoolExecutor(max_workers=len(projects)) as executor:
+        prepared = list(executor.map(
+            lambda project: prepare(project, options.workers,
+                                    options.rebuild),
+            projects,
+        ))
+    jobs = [job for project_jobs in prepared for job in project_jobs]
+    # Части обоих проектов идут одновременно: потоки лишь ждут
+    # подпроцессы pytest.
+    with ThreadPoolExecutor(max_workers=len(jobs) or 1) as executor:
+        results = list(executor.map(lambda job: run_shard(*job), jobs))
+    failed = False
+    spans = {}
+    shard_counts = Counter()
+    for project, number, result, begin, end in results:
+        first, last = spans.get(project, (begin, end))
+        spans[project] = (min(first, begin), max(last, end))
+        shard_counts[project] += 1
+        print(f'{project} [{number}]: {summary(result.stdout)} '
+              f'({end - begin:.1f} с)')
+        if result.returncode:
+            failed = True
+            print(result.stdout, file=sys.stderr)
+    for project, (begin, end) in spans.items():
+        print(f'{project}: {end - begin:.1f} с, '
+              f'частей: {shard_counts[project]}')
+    print(f'Всего: {time.monotonic() - started:.1f} с')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Сравнение курсорной пагинации архива с Paginator (LIMIT/OFFSET).
+
+Запуск из каталога ya_news:
+    python benchmarks/bench_archive.py --rows 1000000
+"""
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+
+from common import setup_django
+
+PER_PAGE = 10
+BATCH_SIZE = 10_000
+
+
+def seed(rows):
+    from news.models import News
+
+    start = date(2000, 1, 1)
+    for offset in range(0, rows, BATCH_SIZE):
+        News.objects.bulk_create(
+            News(
+                title=f'Новость {index}',
+                text='Текст новости.',
+                # По несколько новостей на дату, чтобы ключ (date, id)
+                # действительно понадобился для однозначной сортировки.
+                date=start + timedelta(days=index // 5),
+            )
+            for index in range(offset, min(offset + BATCH_SIZE, rows))
+        )
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.paginator import Paginator
+
+    from news.models import News
+    from news.pagination import encode_cursor, paginate_keyset
+
+    seed(args.rows)
+    ordering = News._meta.ordering
+    queryset = News.objects.all()
+    last_page = args.rows // PER_PAGE
+    pages = sorted({
+        page for page in (1, 100, 1_000, 10_000, last_page)
+        if page <= last_page
+    })
+    print(f'{"page":>8} {"Paginator, ms":>15} {"keyset, ms":>12}')
+    for page in pages:
+        offset = (page - 1) * PER_PAGE
+        cursor = None
+        if offset:
+            # Курсор, который пользователь получил бы на предыдущей
+            # странице; его подготовка в замер не входит.
+            cursor = encode_cursor(
+                queryset.order_by(*ordering)[offset - 1], ordering
+            )
+        offset_ms = measure(
+            lambda: list(Paginator(queryset, PER_PAGE).page(page)),
+            args.repeat,
+        )
+        keyset_ms = measure(
+            lambda: paginate_keyset(queryset, ordering, PER_PAGE, cursor),
+            args.repeat,
+        )
+        print(f'{page:>8} {offset_ms:>15.2f} {keyset_ms:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
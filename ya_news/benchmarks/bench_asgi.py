@@ -0,0 +1,166 @@
+"""
+Нагрузка на страницы для чтения: WSGI против ASGI в одном процессе.
+
+Сравниваются три варианта:
+- wsgi: синхронные представления через WSGIHandler, параллельность —
+  пул потоков, как у многопоточного WSGI-сервера;
+- asgi-sync: те же представления через ASGIHandler (Django оборачивает
+  их в sync_to_async);
+- asgi-async: асинхронные представления из news.async_views.
+Для ASGI одновременные запросы — задачи asyncio, как у uvicorn.
+
+Запуск из каталога ya_news:
+    python benchmarks/bench_asgi.py --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from common import setup_django
+
+NEWS = 1000
+COMMENTS_PER_NEWS = 30
+HOST = 'testserver'
+
+
+def seed():
+    from django.contrib.auth import get_user_model
+
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='bench')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости. ' * 20)
+        for index in range(NEWS)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for news in News.objects.all()
+        for index in range(COMMENTS_PER_NEWS)
+    )
+    return list(News.objects.values_list('pk', flat=True))
+
+
+def make_paths(prefix, pks, count):
+    rng = random.Random(42)
+    paths = []
+    for _ in range(count):
+        kind = rng.choice(('home', 'detail', 'comments'))
+        if kind == 'home':
+            paths.append(f'{prefix}')
+        elif kind == 'detail':
+            paths.append(f'{prefix}news/{rng.choice(pks)}/')
+        else:
+            paths.append(f'{prefix}news/{rng.choice(pks)}/comments/')
+    return paths
+
+
+def run_wsgi(paths, concurrency):
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    def request(path):
+        environ = factory._base_environ(PATH_INFO=path, REQUEST_METHOD='GET')
+        statuses = []
+        start = time.perf_counter()
+        body = handler(
+            environ, lambda status, headers: statuses.append(status)
+        )
+        b''.join(body)
+        body.close()
+        elapsed = time.perf_counter() - start
+        assert statuses[0].startswith('200'), (path, statuses[0])
+        return elapsed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(request, paths))
+    return latencies, time.perf_counter() - started
+
+
+def run_asgi(paths, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+
+    async def request(path, semaphore):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'},
+            'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': b'',
+            'root_path': '', 'headers': [(b'host', HOST.encode())],
+            'client': ('127.0.0.1', 50000), 'server': (HOST, 80),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(scope, receive, send)
+            elapsed = time.perf_counter() - start
+        assert messages[0]['status'] == 200, (path, messages[0]['status'])
+        return elapsed
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(request(path, semaphore) for path in paths)
+        )
+
+    started = time.perf_counter()
+    latencies = asyncio.run(main())
+    return latencies, time.perf_counter() - started
+
+
+def report(name, latencies, seconds):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(
+        f'{name:11} {len(latencies) / seconds:8.1f} запр/с  '
+        f'p50 {p50:7.1f} мс  p99 {p99:7.1f} мс'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Потоки пула открывают свои соединения, поэтому БД — в файле.
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.conf import settings
+
+        settings.ALLOWED_HOSTS = [HOST]
+        pks = seed()
+        print(
+            f'Запросов: {args.requests}, одновременно: {args.concurrency}, '
+            f'потоков БД: {settings.NEWS_DB_THREADS}'
+        )
+        for name, prefix, run in (
+            ('wsgi', '/', run_wsgi),
+            ('asgi-sync', '/', run_asgi),
+            ('asgi-async', '/async/', run_asgi),
+        ):
+            paths = make_paths(prefix, pks, args.requests)
+            run(paths[:50], args.concurrency)
+            report(name, *run(paths, args.concurrency))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Проверка комментариев на запрещённые слова: цикл по словарю
+против автомата Ахо — Корасик.
+
+Запуск из каталога ya_news:
+    python benchmarks/bench_bad_words.py --words 50000
+"""
+import argparse
+import random
+import time
+
+from common import setup_django
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, min_length=4, max_length=9):
+    length = rng.randint(min_length, max_length)
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def old_check(words, text):
+    """Проверка в том виде, в каком она была в CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=50_000)
+    parser.add_argument('--comments', type=int, default=500)
+    parser.add_argument('--length', type=int, default=60,
+                        help='слов в одном комментарии')
+    args = parser.parse_args()
+
+    setup_django()
+    from news.moderation import WordMatcher
+
+    rng = random.Random(42)
+    # Стемы длиннее обычных слов комментариев, поэтому совпадений почти
+    # нет и обе проверки вынуждены просмотреть текст целиком.
+    words = [random_word(rng, 7, 12) for _ in range(args.words)]
+    comments = [
+        ' '.join(random_word(rng, 2, 6) for _ in range(args.length))
+        for _ in range(args.comments)
+    ]
+
+    start = time.perf_counter()
+    matcher = WordMatcher(words)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    old_found = [old_check(words, text) for text in comments]
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_found = [matcher.search(text.lower()) is not None
+                 for text in comments]
+    new_time = time.perf_counter() - start
+
+    assert old_found == new_found
+    per_comment = 1000 / args.comments
+    print(f'словарь: {args.words} слов, автомат: {len(matcher)} состояний, '
+          f'построен за {build_time:.2f} с')
+    print(f'цикл по словарю: {old_time * per_comment:.3f} мс на комментарий')
+    print(f'автомат:         {new_time * per_comment:.3f} мс на комментарий')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Замер всех маршрутов news через тестовый клиент Django.
+
+Для каждого маршрута — запросов в секунду, задержка p50/p95/p99,
+число запросов к БД и пик памяти на запрос. Результаты сохраняются
+в JSON и сравниваются с прошлым замером; при регрессии код выхода 1.
+
+Запуск из каталога ya_news:
+    python benchmarks/bench_endpoints.py --news 10000 --output after.json \
+        --baseline before.json
+"""
+import argparse
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from common import add_report_arguments, measure_endpoint, report, setup_django
+
+
+@contextmanager
+def count_queries():
+    """Запросы к БД, включая выполненные в пуле потоков async-представлений."""
+    from django.db import connection
+
+    from news import aio
+
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    call = aio._call
+
+    def call_recorded(func, args, kwargs):
+        with connection.execute_wrapper(record):
+            return call(func, args, kwargs)
+
+    aio._call = call_recorded
+    try:
+        with connection.execute_wrapper(record):
+            yield queries
+    finally:
+        aio._call = call
+
+
+def seed(news_count, comments_count, pool_size):
+    """
+    Новости, комментарии к самой свежей и запас комментариев автора
+    для замера удаления.
+    """
+    from news.counters import recount
+    from news.models import News
+    from news.pytest_tests.factories import (
+        create_comments, create_news, create_users
+    )
+    from news.search import rebuild_index
+
+    author, reader = create_users('Автор', 'Читатель')
+    staff, = create_users('Сотрудник', is_staff=True)
+    news_pks = create_news(news_count, start=date.today())
+    hot_news = news_pks[0]
+    create_comments((hot_news,), reader, comments_count)
+    comment, = create_comments((hot_news,), author, 1)
+    # Удаляемые комментарии старше остальных: страница новости
+    # не меняется от того, сколько их уже удалено.
+    pool = create_comments(
+        (news_pks[-1],), author, pool_size, step=timedelta(seconds=1)
+    )
+    recount(News.objects.all())
+    rebuild_index()
+    return author, staff, hot_news, comment, pool
+
+
+def plan(author, staff, hot_news, comment, pool):
+    """Маршрут → функция, выполняющая запрос с номером index."""
+    from django.test import Client
+    from django.urls import reverse
+
+    anonymous = Client()
+    author_client = Client()
+    author_client.force_login(author)
+    staff_client = Client()
+    staff_client.force_login(staff)
+    detail = reverse('news:detail', args=(hot_news,))
+    edit = reverse('news:edit', args=(comment,))
+
+    def get(client, name, *args, **params):
+        url = reverse(name, args=args)
+        return lambda index: client.get(url, params)
+
+    return {
+        'news:home': get(anonymous, 'news:home'),
+        'news:archive': get(anonymous, 'news:archive'),
+        'news:search': get(anonymous, 'news:search', q='новость'),
+        'news:export': get(staff_client, 'news:export'),
+        'news:detail': get(anonymous, 'news:detail', hot_news),
+        'news:detail POST': lambda index: author_client.post(
+            detail, {'text': f'Комментарий {index}'}
+        ),
+        'news:comments': get(anonymous, 'news:comments', hot_news),
+        'news:edit': get(author_client, 'news:edit', comment),
+        'news:edit POST': lambda index: author_client.post(
+            edit, {'text': f'Исправленный комментарий {index}'}
+        ),
+        'news:delete': get(author_client, 'news:delete', comment),
+        'news:delete POST': lambda index: author_client.post(
+            reverse('news:delete', args=(pool[index],))
+        ),
+        'news:api_list': get(anonymous, 'news:api_list'),
+        'news:api_detail': get(anonymous, 'news:api_detail', hot_news),
+        'news:api_comments': get(anonymous, 'news:api_comments', hot_news),
+        'news:async_home': get(anonymous, 'news:async_home'),
+        'news:async_detail': get(anonymous, 'news:async_detail', hot_news),
+        'news:async_comments': get(
+            anonymous, 'news:async_comments', hot_news
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=1000,
+                        help='комментариев к самой свежей новости')
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    setup_django()
+    from news import urls
+
+    per_route = args.warmup + args.requests + args.probes
+    routes = plan(*seed(args.news, args.comments, per_route))
+    missing = {
+        f'news:{pattern.name}' for pattern in urls.urlpatterns
+    } - {name.split()[0] for name in routes}
+    if missing:
+        parser.error(f'нет замера для маршрутов: {", ".join(sorted(missing))}')
+    results = {}
+    for name, send in routes.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure_endpoint(
+            send, args.requests, args.warmup, args.probes, count_queries
+        )
+    dataset = {'news': args.news, 'comments': args.comments}
+    return report(args, dataset, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
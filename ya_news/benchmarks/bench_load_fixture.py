@@ -0,0 +1,120 @@
+"""
+Загрузка фикстуры: loaddata против load_news_fixture.
+
+Генерирует синтетическую фикстуру (пользователь, новости и комментарии
+к ним) и загружает её в чистую БД обоими способами.
+
+Запуск из каталога ya_news:
+    python benchmarks/bench_load_fixture.py --objects 1000000
+"""
+import argparse
+import json
+import tempfile
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+
+from common import setup_django, timer
+
+COMMENTS_PER_NEWS = 9
+
+
+def write_fixture(path, objects):
+    """Пишет фикстуру потоково, чтобы не держать её в памяти."""
+    news_count = max(objects // (COMMENTS_PER_NEWS + 1), 1)
+    with open(path, 'w', encoding='utf-8') as stream:
+        stream.write('[\n')
+        stream.write(json.dumps({
+            'model': 'auth.user', 'pk': 1,
+            'fields': {'username': 'bench', 'password': '!'},
+        }))
+        written = 1
+        for news_pk in range(1, news_count + 1):
+            stream.write(',\n' + json.dumps({
+                'model': 'news.news', 'pk': news_pk,
+                'fields': {
+                    'title': f'Новость {news_pk}',
+                    'text': f'Текст новости номер {news_pk}. ' * 5,
+                    'date': '2022-11-01',
+                },
+            }, ensure_ascii=False))
+            written += 1
+            for _ in range(COMMENTS_PER_NEWS):
+                if written >= objects:
+                    break
+                stream.write(',\n' + json.dumps({
+                    'model': 'news.comment', 'pk': written,
+                    'fields': {
+                        'news': news_pk, 'author': 1,
+                        'text': f'Комментарий {written}',
+                        'created': '2022-11-01T10:00:00Z',
+                    },
+                }, ensure_ascii=False))
+                written += 1
+        stream.write('\n]\n')
+    return written
+
+
+def clear():
+    from django.contrib.auth import get_user_model
+
+    from news.models import Comment, News
+
+    Comment.objects.all().delete()
+    News.objects.all().delete()
+    get_user_model().objects.all().delete()
+
+
+def run(results, peaks, name, func, trace_memory):
+    # tracemalloc в разы замедляет загрузку, поэтому время и память
+    # измеряются в разных запусках.
+    if trace_memory:
+        tracemalloc.start()
+    with timer(results, name):
+        func()
+    if trace_memory:
+        peaks[name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--objects', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument(
+        '--trace-memory', action='store_true',
+        help='Измерять пик памяти (tracemalloc) вместо чистого времени.',
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'fixture.json'
+        objects = write_fixture(path, args.objects)
+        size = path.stat().st_size / 2**20
+        print(f'Фикстура: {objects} объектов, {size:.1f} МБ')
+        results, peaks = {}, {}
+        run(results, peaks, 'loaddata', lambda: call_command(
+            'loaddata', str(path), verbosity=0
+        ), args.trace_memory)
+        for skip_signals in (False, True):
+            name = 'load_news_fixture' + (
+                ' --skip-signals' if skip_signals else ''
+            )
+            run(results, peaks, name, lambda: call_command(
+                'load_news_fixture', str(path),
+                batch_size=args.batch_size, skip_signals=skip_signals,
+                stdout=StringIO(),
+            ), args.trace_memory)
+    for name, seconds in results.items():
+        line = f'{name:32} {seconds:8.2f} с  {objects / seconds:10.0f} об/с'
+        if name in peaks:
+            line += f'  пик памяти {peaks[name] / 2**20:7.1f} МБ'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
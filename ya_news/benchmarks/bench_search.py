@@ -0,0 +1,86 @@
+"""
+Поиск по новостям: индекс FTS5 против icontains по title и text.
+
+Запуск из каталога ya_news:
+    python benchmarks/bench_search.py --rows 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from common import setup_django
+
+BATCH_SIZE = 10_000
+PER_PAGE = 10
+QUERIES = ('погода', 'выборы бюджет', 'чемпионат', 'xylophone')
+
+
+def seed(rows):
+    from news.models import News
+
+    rng = random.Random(42)
+    vocabulary = [
+        'город', 'погода', 'выборы', 'бюджет', 'школа', 'дорога', 'театр',
+        'чемпионат', 'наука', 'завод', 'парк', 'мост', 'музей', 'рынок',
+        'урожай', 'выставка', 'концерт', 'больница', 'метро', 'налог',
+    ] + [f'слово{index}' for index in range(5000)]
+    for offset in range(0, rows, BATCH_SIZE):
+        News.objects.bulk_create(
+            News(
+                title=' '.join(rng.choices(vocabulary, k=4)),
+                text=' '.join(rng.choices(vocabulary, k=40)),
+            )
+            for _ in range(offset, min(offset + BATCH_SIZE, rows))
+        )
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.paginator import Paginator
+    from django.db.models import Q
+
+    from news.models import News
+    from news.search import rebuild_index, search_news
+
+    seed(args.rows)
+    start = time.perf_counter()
+    rebuild_index()
+    print(f'индекс по {args.rows} новостям построен '
+          f'за {time.perf_counter() - start:.1f} с')
+
+    def naive(query):
+        condition = Q()
+        for word in query.split():
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        return News.objects.filter(condition).order_by('-date', '-pk')
+
+    print(f'{"запрос":<16} {"icontains, мс":>14} {"FTS5, мс":>10}')
+    for query in QUERIES:
+        naive_ms = measure(
+            lambda: list(Paginator(naive(query), PER_PAGE).page(1)),
+            args.repeat,
+        )
+        fts_ms = measure(
+            lambda: list(Paginator(search_news(query), PER_PAGE).page(1)),
+            args.repeat,
+        )
+        print(f'{query:<16} {naive_ms:>14.1f} {fts_ms:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Одновременная отправка комментариев: профиль БД default против production.
+
+Каждый профиль запускается в отдельном процессе (настройки читаются
+при импорте), внутри — несколько процессов-писателей, которые
+отправляют комментарии через NewsComment (POST на страницу новости)
+в общую файловую БД.
+
+Запуск из каталога ya_news:
+    python benchmarks/bench_sqlite_writers.py --writers 8 --posts 200
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import setup_django
+
+PROFILES = ('default', 'production')
+
+
+def write_comments(task):
+    """Отправляет posts комментариев; возвращает (успешно, ошибок)."""
+    user_pk, news_pk, posts = task
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+    from django.test import Client
+    from django.urls import reverse
+
+    connections.close_all()
+    client = Client()
+    client.force_login(get_user_model().objects.get(pk=user_pk))
+    url = reverse('news:detail', args=(news_pk,))
+    ok = failed = 0
+    for index in range(posts):
+        try:
+            response = client.post(url, {'text': f'Комментарий {index}'})
+            ok += response.status_code == 302
+        except Exception:
+            # «database is locked» и прочие ошибки БД.
+            failed += 1
+    return ok, failed
+
+
+def run_profile(args):
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.conf import settings
+        from django.contrib.auth import get_user_model
+        from django.db import connection, connections
+
+        from news.models import News
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        news = News.objects.create(title='Новость', text='Текст')
+        users = [
+            get_user_model().objects.create(username=f'writer{index}')
+            for index in range(args.writers)
+        ]
+        tasks = [(user.pk, news.pk, args.posts) for user in users]
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        started = time.perf_counter()
+        with context.Pool(args.writers) as pool:
+            results = pool.map(write_comments, tasks)
+        elapsed = time.perf_counter() - started
+    ok = sum(result[0] for result in results)
+    failed = sum(result[1] for result in results)
+    print(
+        f'{settings.DATABASE_PROFILE:11} journal={journal_mode:6} '
+        f'{ok / elapsed:8.1f} комм/с  успешно {ok}, ошибок {failed}, '
+        f'{elapsed:.2f} с'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--profile', choices=PROFILES)
+    args = parser.parse_args()
+    if args.profile:
+        run_profile(args)
+        return
+    for profile in PROFILES:
+        subprocess.run(
+            [sys.executable, __file__, '--profile', profile,
+             '--writers', str(args.writers), '--posts', str(args.posts)],
+            env={**os.environ, 'YANEWS_DB_PROFILE': profile},
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Общая подготовка окружения для бенчмарков YaNews."""
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database_name=None):
+    """
+    Настраивает Django и создаёт чистую тестовую БД.
+
+    По умолчанию БД создаётся в памяти, как при запуске тестов;
+    database_name позволяет разместить её в файле.
+    """
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    import django
+    from django.conf import settings
+
+    if database_name is not None:
+        settings.DATABASES['default']['TEST'] = {'NAME': str(database_name)}
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+@contextmanager
+def timer(results, name):
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+
+def check_response(response):
+    """Дочитывает потоковый ответ и не даёт замерять страницы ошибок."""
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    if response.status_code >= 400:
+        raise RuntimeError(f'Ответ {response.status_code}: {response}')
+    return response
+
+
+def measure_endpoint(send, requests, warmup=5, probes=5,
+                     count_queries=None):
+    """
+    Замер одного маршрута.
+
+    send(index) выполняет запрос с номером index (номера не повторяются,
+    чтобы удаляющие запросы получали свои объекты). Время замеряется
+    без инструментов; число запросов к БД и пик памяти (tracemalloc)
+    — отдельным прогоном probes запросов, так как оба заметно
+    замедляют обработку.
+    """
+    for index in range(warmup):
+        check_response(send(index))
+    latencies = []
+    started = time.perf_counter()
+    for index in range(warmup, warmup + requests):
+        moment = time.perf_counter()
+        check_response(send(index))
+        latencies.append((time.perf_counter() - moment) * 1000)
+    elapsed = time.perf_counter() - started
+    queries = []
+    peaks = []
+    tracemalloc.start()
+    try:
+        for index in range(warmup + requests, warmup + requests + probes):
+            tracemalloc.reset_peak()
+            with count_queries() as captured:
+                check_response(send(index))
+            queries.append(len(captured))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': requests,
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(cuts[49], 3),
+        'p95_ms': round(cuts[94], 3),
+        'p99_ms': round(cuts[98], 3),
+        'queries': max(queries),
+        'peak_kib': round(max(peaks) / 1024, 1),
+    }
+
+
+def environment():
+    import django
+
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'cpus': os.cpu_count(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def print_results(results):
+    print(f'{"маршрут":<28} {"зап/с":>8} {"p50, мс":>9} {"p95, мс":>9} '
+          f'{"p99, мс":>9} {"SQL":>4} {"пик, КиБ":>9}')
+    for name, row in results.items():
+        print(f'{name:<28} {row["rps"]:>8.1f} {row["p50_ms"]:>9.2f} '
+              f'{row["p95_ms"]:>9.2f} {row["p99_ms"]:>9.2f} '
+              f'{row["queries"]:>4} {row["peak_kib"]:>9.1f}')
+
+
+def compare(results, baseline, tolerance):
+    """
+    Регрессии относительно базового замера.
+
+    Число запросов к БД должно совпадать или уменьшиться, p95 и пик
+    памяти могут вырасти не более чем на долю tolerance.
+    """
+    regressions = []
+    for name, row in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if row['queries'] > old['queries']:
+            regressions.append(
+                f'{name}: запросов к БД {old["queries"]} → {row["queries"]}'
+            )
+        for key in ('p95_ms', 'peak_kib'):
+            if row[key] > old[key] * (1 + tolerance):
+                regressions.append(f'{name}: {key} {old[key]} → {row[key]}')
+    return regressions
+
+
+def save_report(path, dataset, results):
+    report = {
+        'environment': environment(),
+        'dataset': dataset,
+        'results': results,
+    }
+    Path(path).write_text(
+        json.dumps(report, ensure_ascii=False, indent=2) + '\n',
+        encoding='utf-8',
+    )
+
+
+def load_results(path):
+    return json.loads(Path(path).read_text(encoding='utf-8'))['results']
+
+
+def add_report_arguments(parser):
+    parser.add_argument('--requests', type=int, default=200,
+                        help='замеряемых запросов на маршрут')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--probes', type=int, default=5,
+                        help='запросов для подсчёта SQL и памяти')
+    parser.add_argument('--output', help='записать результаты в JSON')
+    parser.add_argument('--baseline',
+                        help='JSON прошлого замера для сравнения')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='допустимый рост p95 и памяти, доля')
+    parser.add_argument('--only', nargs='*',
+                        help='замерить только эти маршруты')
+
+
+def report(args, dataset, results):
+    """Печатает и сохраняет результаты; код выхода 1 при регрессиях."""
+    print_results(results)
+    if args.output:
+        save_report(args.output, dataset, results)
+    if not args.baseline:
+        return 0
+    regressions = compare(results, load_results(args.baseline),
+                          args.tolerance)
+    for line in regressions:
+        print(f'РЕГРЕССИЯ {line}')
+    if not regressions:
+        print('Регрессий относительно базового замера нет.')
+    return 1 if regressions else 0
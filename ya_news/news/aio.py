@@ -0,0 +1,50 @@
+"""
+Доступ к БД из асинхронных представлений.
+
+ORM в Django 3.2 синхронный. sync_to_async(thread_sensitive=True)
+выполняет весь синхронный код в одном общем потоке, и запросы всех
+клиентов выстраиваются в очередь. Здесь запросы к БД выполняются
+в отдельном пуле из NEWS_DB_THREADS потоков: параллельно, но не больше
+заданного числа соединений.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .profiling import capture_queries
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.NEWS_DB_THREADS,
+            thread_name_prefix='news-db',
+        )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    try:
+        with capture_queries():
+            return func(*args, **kwargs)
+    finally:
+        # У потоков пула нет своего запроса, поэтому соединение
+        # закрываем сами — с учётом CONN_MAX_AGE, как request_finished.
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    """Выполняет синхронную функцию, работающую с БД, в пуле потоков."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(context.run, _call, func, args, kwargs),
+    )
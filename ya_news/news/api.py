@@ -0,0 +1,89 @@
+"""
+JSON API только для чтения: список новостей, новость и её комментарии.
+
+Данные выбираются через values(), без создания экземпляров моделей.
+Ответы несут ETag и Last-Modified, а повторный запрос с If-None-Match
+получает 304 после одного запроса к БД, без сериализации.
+"""
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.views import generic
+
+from .cache import news_version
+from .conditional import (
+    ConditionalGetMixin, NewsValidatorsMixin, latest, make_etag,
+    news_list_state
+)
+from .models import News
+from .pagination import InvalidCursor, paginate_keyset
+from .views import COMMENTS_ORDERING, get_comments
+
+NEWS_FIELDS = ('id', 'title', 'text', 'date', 'comment_count')
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+
+
+class JsonView(generic.View):
+    """Отдаёт результат get_data() в виде JSON."""
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(
+            self.get_data(), json_dumps_params={'ensure_ascii': False}
+        )
+
+    def get_data(self):
+        raise NotImplementedError
+
+    def paginate(self, queryset, ordering, per_page):
+        """Курсорная страница queryset и ссылка на следующую."""
+        try:
+            page = paginate_keyset(
+                queryset, ordering, per_page, self.request.GET.get('cursor')
+            )
+        except InvalidCursor:
+            raise Http404('Некорректный курсор.')
+        next_url = None
+        if page.has_next:
+            next_url = self.request.build_absolute_uri(
+                f'{self.request.path}?cursor={page.next_cursor}'
+            )
+        return {'results': page.object_list, 'next': next_url}
+
+
+class NewsListApi(ConditionalGetMixin, JsonView):
+    """Все новости, от свежих к старым, страницами по курсору."""
+
+    def get_validators(self):
+        # Остальные изменения списка учитывает версия из кеша.
+        row = news_list_state()
+        version = news_version()
+        etag = make_etag(
+            row['pk'], row['date'], row['last_comment'], version.token,
+            self.request.GET.urlencode(),
+        )
+        return etag, latest(row['date'], row['last_comment'], version.modified)
+
+    def get_data(self):
+        return self.paginate(
+            News.objects.values(*NEWS_FIELDS),
+            News._meta.ordering,
+            settings.NEWS_COUNT_ON_ARCHIVE_PAGE,
+        )
+
+
+class NewsDetailApi(NewsValidatorsMixin, ConditionalGetMixin, JsonView):
+
+    def get_data(self):
+        return News.objects.filter(
+            pk=self.kwargs['pk']
+        ).values(*NEWS_FIELDS).get()
+
+
+class NewsCommentsApi(NewsValidatorsMixin, ConditionalGetMixin, JsonView):
+    """Комментарии к новости в порядке добавления, страницами по курсору."""
+
+    def get_data(self):
+        return self.paginate(
+            get_comments(self.kwargs['pk']).values(*COMMENT_FIELDS),
+            COMMENTS_ORDERING,
+            settings.COMMENTS_COUNT_ON_NEWS_PAGE,
+        )
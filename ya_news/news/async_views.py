@@ -0,0 +1,156 @@
+"""
+Асинхронные версии страниц для чтения: главная, новость, комментарии.
+
+Разметка и заголовки совпадают с синхронными NewsList, NewsDetail
+и NewsComments. Запросы к БД и отрисовка шаблонов выполняются через
+news.aio.run_db: тег news_card читает и пишет кеш, а это блокирующий
+ввод-вывод.
+"""
+import functools
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from django.shortcuts import get_object_or_404, render
+
+from .aio import run_db
+from .cache import HOME_PAGE_KEY, cache_get, cache_set, page_key
+from .conditional import (
+    home_state, home_validators, news_validators, not_modified,
+    patch_cache_headers, set_validators, user_state
+)
+from .forms import CommentForm
+from .models import News
+from .pagination import InvalidCursor, paginate_keyset
+from .views import COMMENTS_ORDERING, get_comments
+
+COMMENTS_URL = 'news:async_comments'
+
+
+def safe_only(view):
+    """Аналог require_safe для асинхронных представлений."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(('GET', 'HEAD'))
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _with_user(request, func, *args):
+    """
+    Загружает пользователя и вызывает func в том же потоке пула:
+    request.user ленивый, и обращение к нему из цикла событий выполнило
+    бы запрос к сессии прямо в асинхронном коде.
+    """
+    request.user = get_user(request)
+    return func(*args)
+
+
+async def conditional(request, get_validators, get_response):
+    """
+    Асинхронный аналог ConditionalGetMixin.get.
+
+    Пользователь и валидаторы получаются за одно обращение к пулу.
+    """
+    etag, last_modified = await run_db(_with_user, request, get_validators)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = await get_response()
+    set_validators(response, etag, last_modified)
+    patch_cache_headers(request, response, settings.NEWS_HTTP_CACHE_MAX_AGE)
+    return response
+
+
+def _home_news():
+    """Новости главной страницы и её версия (см. home_state)."""
+    object_list = list(
+        News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    )
+    return object_list, home_state(object_list)
+
+
+def _news_with_comments(pk):
+    news = get_object_or_404(News, pk=pk)
+    comments_page = paginate_keyset(
+        get_comments(pk),
+        COMMENTS_ORDERING,
+        settings.COMMENTS_COUNT_ON_NEWS_PAGE,
+    )
+    return news, comments_page
+
+
+def _render_home(request, object_list, key=None):
+    """Отрисовывает главную и, если передан key, кладёт её в кеш."""
+    response = render(
+        request, 'news/home.html', {'object_list': object_list}
+    )
+    if key is not None:
+        cache_set(key, response.content)
+    return response
+
+
+@safe_only
+async def news_list(request):
+    home = {}
+
+    def get_validators():
+        home['news'], home['state'] = _home_news()
+        return home_validators(request, home['state'])
+
+    async def get_response():
+        anonymous = not request.user.is_authenticated
+        key = page_key(HOME_PAGE_KEY, home['state'])
+        if anonymous:
+            content = await run_db(cache_get, key)
+            if content is not None:
+                return HttpResponse(content)
+        return await run_db(
+            _render_home, request, home['news'], key if anonymous else None
+        )
+
+    return await conditional(request, get_validators, get_response)
+
+
+@safe_only
+async def news_detail(request, pk):
+
+    def get_validators():
+        return news_validators(
+            pk, request.GET.urlencode(), user_state(request)
+        )
+
+    async def get_response():
+        news, comments_page = await run_db(_news_with_comments, pk)
+        context = {
+            'object': news,
+            'news': news,
+            'comments_page': comments_page,
+            'comments_url': COMMENTS_URL,
+        }
+        if request.user.is_authenticated:
+            context['form'] = CommentForm()
+        return await run_db(render, request, 'news/detail.html', context)
+
+    return await conditional(request, get_validators, get_response)
+
+
+@safe_only
+async def news_comments(request, pk):
+    try:
+        page = await run_db(
+            _with_user,
+            request,
+            paginate_keyset,
+            get_comments(pk),
+            COMMENTS_ORDERING,
+            settings.COMMENTS_COUNT_ON_NEWS_PAGE,
+            request.GET.get('cursor'),
+        )
+    except InvalidCursor:
+        raise Http404('Некорректный курсор.')
+    return await run_db(render, request, 'news/includes/comments.html', {
+        'page_obj': page,
+        'news_pk': pk,
+        'comments_url': COMMENTS_URL,
+    })
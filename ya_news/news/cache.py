@@ -0,0 +1,113 @@
+from collections import namedtuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+HOME_PAGE_KEY = 'news:home'
+NEWS_CARD_KEY = 'news:card:{pk}:{comment_count}:{version}'
+VERSION_KEY = 'news:version:{pk}'
+ALL_NEWS = 'all'
+
+NewsVersion = namedtuple('NewsVersion', ('token', 'modified'))
+HITS_KEY = 'news:stats:hits'
+MISSES_KEY = 'news:stats:misses'
+
+
+def get_cache():
+    """Кеш, в котором хранятся страницы и карточки новостей."""
+    return caches[settings.NEWS_CACHE_ALIAS]
+
+
+def _increment(key):
+    cache = get_cache()
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Ключ успели вытеснить между add() и incr().
+            cache.add(key, 1, timeout=None)
+
+
+def cache_get(key):
+    """Читает значение из кеша и учитывает попадание или промах."""
+    value = get_cache().get(key)
+    _increment(MISSES_KEY if value is None else HITS_KEY)
+    return value
+
+
+def cache_set(key, value):
+    get_cache().set(key, value, settings.NEWS_CACHE_TIMEOUT)
+
+
+def news_card_key(news):
+    """
+    Ключ карточки новости: меняется вместе с её версией и со счётчиком
+    комментариев, который мог изменить и другой процесс.
+    """
+    return NEWS_CARD_KEY.format(
+        pk=news.pk,
+        comment_count=news.comment_count,
+        version=news_version(news.pk).token,
+    )
+
+
+def news_version(pk=ALL_NEWS):
+    """
+    Версия новости (или всего списка при pk=ALL_NEWS): метка и время.
+
+    Меняется при каждом invalidate_news и входит в ETag вместе
+    с состоянием из БД: так клиент увидит и правки текста, которые
+    в БД не оставляют других следов. Время создания версии не раньше
+    последнего изменения, поэтому годится для Last-Modified.
+
+    Кеш может быть у каждого процесса свой, а invalidate_news сбрасывает
+    версию только в своём. Поэтому версия живёт NEWS_CACHE_TIMEOUT:
+    правки, сделанные другим процессом, видны не позже этого срока.
+    """
+    return get_cache().get_or_set(
+        VERSION_KEY.format(pk=pk),
+        lambda: NewsVersion(uuid4().hex, timezone.now()),
+        timeout=settings.NEWS_CACHE_TIMEOUT,
+    )
+
+
+def page_key(key, version=None):
+    """
+    Ключ страницы в кеше для версии version (по умолчанию — текущей
+    версии списка новостей).
+
+    Версию читают до отрисовки: страница, отрисованная до
+    invalidate_news, сохранится под прежней версией, и новые запросы
+    её уже не получат.
+    """
+    return f'{key}:{(version or news_version()).token}'
+
+
+def invalidate_news(*pks):
+    """
+    Сбрасывает версии списка и указанных новостей, а с ними главную
+    страницу и карточки: их ключи содержат версию.
+    """
+    get_cache().delete_many([
+        VERSION_KEY.format(pk=ALL_NEWS),
+        *(VERSION_KEY.format(pk=pk) for pk in pks),
+    ])
+
+
+def cache_stats():
+    """Счётчики попаданий и промахов кеша."""
+    values = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_cache_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,200 @@
+"""
+Условные GET-запросы: ETag, Last-Modified и Cache-Control.
+
+В отличие от декоратора django.views.decorators.http.condition, оба
+валидатора вычисляются одним вызовом get_validators(), то есть обычно
+одним запросом к БД.
+"""
+import hashlib
+from calendar import timegm
+from datetime import date, datetime, time
+
+from django.db.models import Subquery
+from django.http import Http404
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+    quote_etag
+)
+from django.utils.http import http_date
+
+from .cache import NewsVersion, news_version
+from .models import Comment, News
+
+
+def digest(*parts):
+    raw = '|'.join(str(part) for part in parts).encode()
+    return hashlib.md5(raw).hexdigest()
+
+
+def make_etag(*parts):
+    """Короткий ETag из значений, от которых зависит ответ."""
+    return quote_etag(digest(*parts))
+
+
+def latest(*moments):
+    """Самый поздний из моментов; даты считаются началом суток в UTC."""
+    moments = [
+        datetime.combine(moment, time.min, tzinfo=timezone.utc)
+        if isinstance(moment, date) and not isinstance(moment, datetime)
+        else moment
+        for moment in moments
+        if moment is not None
+    ]
+    return max(moments, default=None)
+
+
+def user_state(request):
+    """
+    Часть ETag, зависящая от пользователя.
+
+    У авторизованного в страницу попадают его имя и CSRF-токен формы,
+    поэтому чужая или устаревшая копия не должна совпасть по ETag.
+    """
+    if not request.user.is_authenticated:
+        return 'anonymous'
+    # get_token() гарантирует, что значение CSRF-куки уже выбрано:
+    # иначе первый ответ и повторный запрос дали бы разные ETag.
+    get_token(request)
+    return (
+        request.user.pk,
+        request.user.get_username(),
+        request.META['CSRF_COOKIE'],
+    )
+
+
+def news_state(pk):
+    """
+    Дата новости, число её комментариев и время последнего из них.
+
+    Скрытие или удаление любого комментария меняет счётчик, даже если
+    время последнего комментария остаётся прежним.
+    """
+    return News.objects.filter(pk=pk).values(
+        'date', 'comment_count', 'last_commented_at'
+    ).first()
+
+
+def news_list_state():
+    """
+    Самая свежая новость и самый новый комментарий.
+
+    Оба значения берутся из начала индексов одним запросом.
+    """
+    last_comment = Comment.objects.order_by('-pk').values('created')[:1]
+    row = News.objects.annotate(
+        last_comment=Subquery(last_comment)
+    ).values('pk', 'date', 'last_comment').first()
+    return row or {'pk': None, 'date': None, 'last_comment': None}
+
+
+def home_state(object_list):
+    """
+    Версия главной страницы по её новостям: даты, счётчики
+    и время последних комментариев, а также версия списка из кеша.
+
+    Новости страницы уже загружены для отрисовки, поэтому версия
+    не стоит отдельного запроса и видит изменения, сделанные в БД
+    любым процессом.
+    """
+    version = news_version()
+    rows = [
+        (news.pk, news.date, news.comment_count, news.last_commented_at)
+        for news in object_list
+    ]
+    return NewsVersion(digest(version.token, *rows), latest(
+        version.modified,
+        *(news.date for news in object_list),
+        *(news.last_commented_at for news in object_list),
+    ))
+
+
+def home_validators(request, state):
+    """Валидаторы главной страницы по её версии (см. home_state)."""
+    return make_etag(state.token, user_state(request)), state.modified
+
+
+def news_validators(pk, *parts):
+    """
+    Валидаторы страницы одной новости: её дата, последний комментарий
+    и версия из кеша (правки и модерация комментариев).
+    """
+    row = news_state(pk)
+    if row is None:
+        raise Http404('Новость не найдена.')
+    version = news_version(pk)
+    etag = make_etag(
+        pk, row['date'], row['comment_count'], row['last_commented_at'],
+        version.token, *parts
+    )
+    # Время версии сдвигает Last-Modified и при правках, которые
+    # не меняют дат, — для клиентов, присылающих только If-Modified-Since.
+    return etag, latest(
+        row['date'], row['last_commented_at'], version.modified
+    )
+
+
+def _timestamp(last_modified):
+    return timegm(last_modified.utctimetuple()) if last_modified else None
+
+
+def not_modified(request, etag, last_modified):
+    """Ответ 304 (или 412), если копия клиента актуальна, иначе None."""
+    return get_conditional_response(
+        request, etag=etag, last_modified=_timestamp(last_modified)
+    )
+
+
+def set_validators(response, etag, last_modified):
+    if etag and not response.has_header('ETag'):
+        response['ETag'] = etag
+    if last_modified and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+
+
+def patch_cache_headers(request, response, max_age):
+    """
+    Ответ анониму может храниться в общих кешах max_age секунд,
+    а ответ пользователю — только в его браузере и с перепроверкой.
+    """
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ('Cookie',))
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304 Not Modified, не вызывая основной обработчик GET.
+
+    Наследник реализует get_validators() и возвращает пару
+    (etag, last_modified); любой из валидаторов может быть None.
+    Если задан cache_max_age, к ответу добавляется Cache-Control
+    (см. patch_cache_headers).
+    """
+    cache_max_age = None
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        set_validators(response, etag, last_modified)
+        if self.cache_max_age is not None:
+            patch_cache_headers(request, response, self.cache_max_age)
+        return response
+
+
+class NewsValidatorsMixin:
+    """Валидаторы страницы одной новости (см. news_validators)."""
+
+    def get_etag_parts(self):
+        return (self.request.GET.urlencode(),)
+
+    def get_validators(self):
+        return news_validators(self.kwargs['pk'], *self.get_etag_parts())
@@ -0,0 +1,66 @@
+"""
+Денормализованные счётчики комментариев у новости.
+
+News.comment_count и News.last_commented_at учитывают только видимые
+(не скрытые модератором) комментарии. Представления меняют их F()-
+выражениями вместе с самим комментарием; после массовых операций
+(модерация, загрузка фикстур) счётчики пересчитываются здесь.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, News
+
+# Сколько pk передаётся в один запрос pk__in.
+RECOUNT_BATCH_SIZE = 500
+
+
+def comment_added(comment):
+    """Учитывает новый комментарий одним UPDATE, без чтения новости."""
+    News.objects.filter(pk=comment.news_id).update(
+        comment_count=F('comment_count') + 1,
+        last_commented_at=comment.created,
+    )
+
+
+def _last_comment():
+    return Comment.objects.filter(
+        news=OuterRef('pk'), flagged=False
+    ).order_by('-created').values('created')[:1]
+
+
+def comment_removed(comment):
+    """
+    Учитывает удаление видимого комментария.
+
+    Счётчик не уходит ниже нуля, даже если разошёлся с данными
+    (комментарий добавлен в обход представлений).
+    """
+    if comment.flagged:
+        return
+    News.objects.filter(pk=comment.news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        last_commented_at=Subquery(_last_comment()),
+    )
+
+
+def recount(queryset):
+    """Пересчитывает счётчики новостей queryset; возвращает их число."""
+    comment_count = Comment.objects.filter(
+        news=OuterRef('pk'), flagged=False
+    ).order_by().values('news').annotate(count=Count('pk')).values('count')
+    return queryset.update(
+        comment_count=Coalesce(Subquery(comment_count), 0),
+        last_commented_at=Subquery(_last_comment()),
+    )
+
+
+def recount_news(pks):
+    """Пересчитывает счётчики новостей с указанными pk пачками."""
+    pks = list(pks)
+    updated = 0
+    for index in range(0, len(pks), RECOUNT_BATCH_SIZE):
+        updated += recount(
+            News.objects.filter(pk__in=pks[index:index + RECOUNT_BATCH_SIZE])
+        )
+    return updated
@@ -0,0 +1,102 @@
+"""
+Потоковая выгрузка новостей и комментариев в NDJSON и CSV.
+
+Строки читаются через QuerySet.iterator() и сразу превращаются в куски
+текста, поэтому расход памяти не зависит от объёма выгрузки.
+"""
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, News
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+NEWS_FIELDS = ('id', 'title', 'text', 'date')
+COMMENT_FIELDS = ('id', 'news_id', 'author_id', 'text', 'created', 'flagged')
+CSV_COLUMNS = (
+    'model', 'id', 'news_id', 'author_id', 'title', 'text', 'date',
+    'created', 'flagged',
+)
+# Размер куска, которым отдаётся выгрузка: меньше — больше накладных
+# расходов на каждый кусок, больше — больше памяти на запрос.
+BUFFER_SIZE = 64 * 1024
+
+
+def iter_records(chunk_size=2000):
+    """Все новости, затем все комментарии, в порядке pk."""
+    news = News.objects.order_by('pk').values(*NEWS_FIELDS)
+    for row in news.iterator(chunk_size=chunk_size):
+        yield {'model': 'news.news', **row}
+    comments = Comment.objects.order_by('pk').values(*COMMENT_FIELDS)
+    for row in comments.iterator(chunk_size=chunk_size):
+        yield {'model': 'news.comment', **row}
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _buffered(lines):
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def render_ndjson(records):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    return _buffered(encoder.encode(record) + '\n' for record in records)
+
+
+def render_csv(records, columns):
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(columns)
+        for record in records:
+            yield writer.writerow(
+                [record.get(column, '') for column in columns]
+            )
+
+    return _buffered(lines())
+
+
+def gzip_stream(chunks):
+    """Сжимает поток текстовых кусков в gzip, не накапливая его целиком."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(records, export_format, columns, compress=False):
+    """Куски выгрузки: str без сжатия и bytes при compress=True."""
+    if export_format == 'csv':
+        chunks = render_csv(records, columns)
+    else:
+        chunks = render_ndjson(records)
+    if compress:
+        return gzip_stream(chunks)
+    return chunks
+
+
+def export_news(export_format='ndjson', compress=False, chunk_size=2000):
+    return export_stream(
+        iter_records(chunk_size), export_format, CSV_COLUMNS, compress
+    )
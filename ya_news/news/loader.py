@@ -0,0 +1,191 @@
+"""
+Быстрая загрузка фикстур в формате news.json.
+
+В отличие от loaddata, файл читается потоково (JSON-массив разбирается
+по одному объекту), а объекты сохраняются пачками через bulk_create.
+Как и loaddata, объекты с уже существующими pk обновляются
+(bulk_update), поэтому фикстуру можно загружать повторно.
+"""
+import json
+from collections import defaultdict
+
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.models.signals import post_save, pre_save
+
+from .counters import recount_news
+from .models import Comment, News
+
+READ_SIZE = 64 * 1024
+# Сколько pk проверяется одним запросом pk__in.
+PK_BATCH_SIZE = 500
+_WHITESPACE = ' \t\n\r'
+
+
+def _skip(buffer, position, chars):
+    while position < len(buffer) and buffer[position] in chars:
+        position += 1
+    return position
+
+
+def _open_array(stream, read_size):
+    """Читает поток до открывающей скобки массива."""
+    buffer = ''
+    position = 0
+    while position == len(buffer):
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        buffer += chunk
+        position = _skip(buffer, position, _WHITESPACE)
+    if buffer[position:position + 1] != '[':
+        raise ValueError('Фикстура должна быть JSON-массивом.')
+    return buffer, position + 1
+
+
+def iter_json_array(stream, read_size=READ_SIZE):
+    """
+    Элементы JSON-массива из текстового потока по одному.
+
+    В памяти держится только текущий кусок файла, а не весь массив.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position = _open_array(stream, read_size)
+    eof = False
+    while True:
+        position = _skip(buffer, position, _WHITESPACE + ',')
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            if position >= len(buffer):
+                raise json.JSONDecodeError('Нет данных', buffer, position)
+            obj, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Объект обрезан границей куска: дочитываем файл.
+            chunk = stream.read(read_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield obj
+        if position > read_size:
+            buffer = buffer[position:]
+            position = 0
+
+
+class FixtureLoader:
+    """
+    Сохраняет десериализованные объекты пачками по batch_size.
+
+    Объектам без pk он назначается заранее (следующий после максимального
+    в таблице), чтобы после bulk_create можно было отправить сигналы
+    и чтобы результат не зависел от того, возвращает ли СУБД pk.
+    """
+
+    def __init__(self, batch_size=5000, send_signals=True):
+        self.batch_size = batch_size
+        self.send_signals = send_signals
+        self.pending = defaultdict(list)
+        self.next_pk = {}
+        self.counts = defaultdict(int)
+        # Новости, счётчики комментариев которых нужно пересчитать.
+        self.news_to_recount = set()
+
+    def add(self, deserialized):
+        obj = deserialized.object
+        model = type(obj)
+        if obj.pk is None:
+            obj.pk = self._allocate_pk(model)
+        if model is Comment:
+            self.news_to_recount.add(obj.news_id)
+        if any(deserialized.m2m_data.values()):
+            # Связи многие-ко-многим пачкой не сохранить — это редкий
+            # случай (например, пользователи с группами).
+            self.flush(model)
+            deserialized.save()
+            self.counts[model] += 1
+            return
+        self.pending[model].append(obj)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def _allocate_pk(self, model):
+        if model not in self.next_pk:
+            self.flush(model)
+            max_pk = model._default_manager.aggregate(
+                max_pk=Max('pk')
+            )['max_pk']
+            self.next_pk[model] = (max_pk or 0) + 1
+        pk = self.next_pk[model]
+        self.next_pk[model] += 1
+        return pk
+
+    @staticmethod
+    def _existing_pks(model, objects):
+        """Какие из pk объектов уже есть в таблице."""
+        pks = [obj.pk for obj in objects]
+        existing = set()
+        for start in range(0, len(pks), PK_BATCH_SIZE):
+            existing.update(model._default_manager.filter(
+                pk__in=pks[start:start + PK_BATCH_SIZE]
+            ).values_list('pk', flat=True))
+        return existing
+
+    def flush(self, model=None):
+        models = [model] if model is not None else list(self.pending)
+        for model in models:
+            objects = self.pending.pop(model, [])
+            if not objects:
+                continue
+            existing = self._existing_pks(model, objects)
+            if self.send_signals:
+                for obj in objects:
+                    pre_save.send(sender=model, instance=obj, raw=True,
+                                  using=connection.alias, update_fields=None)
+            model._default_manager.bulk_create(
+                [obj for obj in objects if obj.pk not in existing]
+            )
+            updated = [obj for obj in objects if obj.pk in existing]
+            if updated:
+                model._default_manager.bulk_update(updated, [
+                    field.name for field in model._meta.concrete_fields
+                    if not field.primary_key
+                ])
+                if model is News:
+                    # Счётчики из фикстуры могли затереть настоящие.
+                    self.news_to_recount.update(obj.pk for obj in updated)
+            if self.send_signals:
+                for obj in objects:
+                    post_save.send(sender=model, instance=obj,
+                                   created=obj.pk not in existing, raw=True,
+                                   using=connection.alias,
+                                   update_fields=None)
+            self.counts[model] += len(objects)
+
+
+def load_fixture(stream, batch_size=5000, send_signals=True):
+    """
+    Загружает фикстуру из потока в одной транзакции.
+
+    Возвращает словарь модель → число загруженных объектов.
+    """
+    loader = FixtureLoader(batch_size, send_signals)
+    with transaction.atomic():
+        for deserialized in Deserializer(iter_json_array(stream)):
+            loader.add(deserialized)
+        loader.flush()
+        # Счётчики комментариев bulk_create и bulk_update не обновляют.
+        recount_news(loader.news_to_recount)
+        models = list(loader.counts)
+        # Как и loaddata: после вставки с явными pk сдвигаем
+        # последовательности (для SQLite список запросов пуст).
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+    return dict(loader.counts)
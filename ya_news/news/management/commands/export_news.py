@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from news.export import FORMATS, export_news
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает все новости и комментарии в NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=tuple(FORMATS), default='ndjson',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжать выгрузку gzip.',
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки; по умолчанию — стандартный вывод.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunks = export_news(
+            options['format'], options['gzip'], options['chunk_size']
+        )
+        if options['output'] == '-':
+            output = sys.stdout.buffer
+        else:
+            output = open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk if options['gzip'] else chunk.encode())
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
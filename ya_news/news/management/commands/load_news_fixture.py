@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from news.loader import load_fixture
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро загружает фикстуру в формате news.json: файл читается '
+        'потоково, объекты сохраняются пачками через bulk_create, '
+        'существующие (по pk) обновляются, как в loaddata.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к JSON-фикстуре.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--skip-signals', action='store_true',
+            help=(
+                'Не отправлять pre_save/post_save. Быстрее, но кеш и '
+                'поисковый индекс придётся обновить самостоятельно.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        with open(options['path'], encoding='utf-8') as stream:
+            counts = load_fixture(
+                stream, options['batch_size'], not options['skip_signals']
+            )
+        for model, count in counts.items():
+            self.stdout.write(f'{model._meta.label}: {count}')
+        if options['skip_signals']:
+            self.stdout.write(
+                'Сигналы не отправлялись: выполните rebuild_search_index.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {sum(counts.values())}.'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from news.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс новостей.'
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'В поисковый индекс добавлено новостей: {count}.'
+        ))
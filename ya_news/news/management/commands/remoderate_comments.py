@@ -0,0 +1,140 @@
+import multiprocessing
+import time
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max
+
+from news.cache import invalidate_news
+from news.counters import recount_news
+from news.models import Comment
+from news.moderation import get_matcher
+
+# Сколько первичных ключей передаётся в один запрос pk__in: с запасом
+# укладывается в ограничение SQLite на число параметров запроса.
+UPDATE_BATCH_SIZE = 500
+
+
+def _init_worker():
+    # При запуске через spawn процесс начинается с чистого интерпретатора,
+    # а при fork соединения родителя использовать нельзя.
+    django.setup()
+    connections.close_all()
+
+
+def remoderate_range(task):
+    """
+    Проверяет комментарии с pk из [start, stop) и обрабатывает нарушителей.
+
+    Возвращает (stop, проверено, найдено нарушений).
+    """
+    start, stop, action, chunk_size = task
+    matcher = get_matcher()
+    offenders = []
+    news_ids = set()
+    checked = 0
+    comments = Comment.objects.filter(
+        pk__gte=start, pk__lt=stop, flagged=False
+    ).order_by().values_list('pk', 'news_id', 'text')
+    for pk, news_id, text in comments.iterator(chunk_size=chunk_size):
+        checked += 1
+        if matcher.search(text.lower()) is not None:
+            offenders.append(pk)
+            news_ids.add(news_id)
+    for index in range(0, len(offenders), UPDATE_BATCH_SIZE):
+        batch = Comment.objects.filter(
+            pk__in=offenders[index:index + UPDATE_BATCH_SIZE]
+        )
+        if action == 'delete':
+            batch.delete()
+        else:
+            batch.update(flagged=True)
+    if news_ids:
+        recount_news(news_ids)
+        # update() не отправляет сигналы, поэтому кеш сбрасываем сами.
+        invalidate_news(*news_ids)
+    return stop, checked, len(offenders)
+
+
+class Command(BaseCommand):
+    help = (
+        'Повторно проверяет сохранённые комментарии по словарю '
+        'запрещённых слов и скрывает или удаляет нарушителей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--action', choices=('flag', 'delete'), default='flag',
+            help='Скрыть найденные комментарии или удалить их.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из БД за один раз.',
+        )
+        parser.add_argument(
+            '--range-size', type=int, default=100_000,
+            help='Ширина диапазона pk, обрабатываемого одной задачей.',
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов-обработчиков.',
+        )
+        parser.add_argument(
+            '--start-pk', type=int, default=None,
+            help='Начать с комментариев, у которых pk больше указанного.',
+        )
+        parser.add_argument(
+            '--state-file',
+            help=(
+                'Файл, в котором сохраняется последний обработанный pk. '
+                'Если он есть, проверка продолжается с этого места.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        state_file = options['state_file'] and Path(options['state_file'])
+        start_pk = options['start_pk']
+        if start_pk is None:
+            start_pk = 0
+            if state_file and state_file.exists():
+                start_pk = int(state_file.read_text())
+        max_pk = Comment.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        range_size = options['range_size']
+        tasks = [
+            (start, min(start + range_size, max_pk + 1),
+             options['action'], options['chunk_size'])
+            for start in range(start_pk + 1, max_pk + 1, range_size)
+        ]
+        started = time.perf_counter()
+        checked = offending = 0
+        if options['processes'] > 1:
+            connections.close_all()
+            with multiprocessing.Pool(
+                options['processes'], initializer=_init_worker
+            ) as pool:
+                # imap сохраняет порядок задач, поэтому после каждой из них
+                # все меньшие pk гарантированно обработаны.
+                for stop, range_checked, range_offending in pool.imap(
+                    remoderate_range, tasks
+                ):
+                    checked += range_checked
+                    offending += range_offending
+                    self._save_state(state_file, stop - 1)
+        else:
+            for task in tasks:
+                stop, range_checked, range_offending = remoderate_range(task)
+                checked += range_checked
+                offending += range_offending
+                self._save_state(state_file, stop - 1)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено комментариев: {checked}, нарушений: {offending} '
+            f'({options["action"]}), за {elapsed:.1f} с.'
+        ))
+
+    def _save_state(self, state_file, last_pk):
+        if state_file:
+            state_file.write_text(str(last_pk))
+        self.stdout.write(f'Обработаны комментарии до pk={last_pk}.')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from news.cache import invalidate_news
+from news.counters import recount
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает у новостей число видимых комментариев и время '
+        'последнего комментария.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--range-size', type=int, default=10_000,
+            help='Сколько pk новостей пересчитывается одним UPDATE.',
+        )
+
+    def handle(self, *args, **options):
+        max_pk = News.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        range_size = options['range_size']
+        updated = 0
+        for start in range(1, max_pk + 1, range_size):
+            # Диапазонами по pk, чтобы не держать блокировку записи
+            # на всё время пересчёта.
+            updated += recount(
+                News.objects.filter(pk__gte=start, pk__lt=start + range_size)
+            )
+        # update() не отправляет сигналы: сбрасываем главную и версии.
+        invalidate_news()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны счётчики у новостей: {updated}.'
+        ))
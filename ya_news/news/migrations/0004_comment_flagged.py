@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_news_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='flagged',
+            field=models.BooleanField(default=False, verbose_name='Скрыт модератором'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='last_commented_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последний комментарий'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    visible = Comment.objects.filter(news=OuterRef('pk'), flagged=False)
+    News.objects.update(
+        comment_count=Coalesce(Subquery(
+            visible.order_by().values('news')
+            .annotate(count=Count('pk')).values('count')
+        ), 0),
+        last_commented_at=Subquery(
+            visible.order_by('-created').values('created')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_comment_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
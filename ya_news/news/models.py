@@ -8,9 +8,21 @@ class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    # Счётчики видимых комментариев: обновляются при добавлении
+    # и удалении комментария, пересчитываются командой
+    # repair_comment_counters.
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев', default=0, editable=False
+    )
+    last_commented_at = models.DateTimeField(
+        'Последний комментарий', null=True, blank=True, editable=False
+    )
 
     class Meta:
-        ordering = ('-date',)
+        ordering = ('-date', '-pk')
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -29,9 +41,19 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    flagged = models.BooleanField(
+        'Скрыт модератором',
+        default=False,
+    )
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_id_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
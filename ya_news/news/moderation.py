@@ -0,0 +1,124 @@
+import os
+from collections import deque
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+BAD_WORDS = (
+    'редиска',
+    'негодяй',
+    # Дополните список на своё усмотрение.
+)
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска любого из слов в тексте.
+
+    Строится один раз, после чего текст любой длины проверяется за один
+    проход независимо от количества слов в словаре.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]
+        for word in words:
+            self._add(word)
+        self._build_fail_links()
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[state][char] = next_state
+            state = next_state
+        if self._output[state] is None:
+            self._output[state] = word
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._output[next_state] is None:
+                    # Слово может оканчиваться внутри более длинного.
+                    self._output[next_state] = (
+                        self._output[self._fail[next_state]]
+                    )
+
+    def __len__(self):
+        return len(self._goto)
+
+    def search(self, text):
+        """Первое найденное в text слово или None."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+
+def load_words():
+    """
+    Словарь запрещённых слов.
+
+    Берётся из файла NEWS_BAD_WORDS_FILE (по слову на строку, строки
+    с # пропускаются), иначе из настройки NEWS_BAD_WORDS или BAD_WORDS.
+    """
+    path = getattr(settings, 'NEWS_BAD_WORDS_FILE', None)
+    if path:
+        with open(path, encoding='utf-8') as file:
+            words = [line.strip() for line in file]
+        return [word.lower() for word in words
+                if word and not word.startswith('#')]
+    words = getattr(settings, 'NEWS_BAD_WORDS', BAD_WORDS)
+    return [word.lower() for word in words]
+
+
+def _words_signature():
+    path = getattr(settings, 'NEWS_BAD_WORDS_FILE', None)
+    if path:
+        return path, os.stat(path).st_mtime_ns
+    return None
+
+
+_matcher = None
+_signature = None
+
+
+def get_matcher():
+    """
+    Автомат для текущего словаря, общий для всего процесса.
+
+    Пересобирается, если изменился файл словаря или настройки.
+    """
+    global _matcher, _signature
+    signature = _words_signature()
+    if _matcher is None or signature != _signature:
+        _matcher, _signature = WordMatcher(load_words()), signature
+    return _matcher
+
+
+@receiver(setting_changed)
+def reset_matcher(setting, **kwargs):
+    global _matcher
+    if setting in ('NEWS_BAD_WORDS', 'NEWS_BAD_WORDS_FILE'):
+        _matcher = None
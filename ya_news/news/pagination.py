@@ -0,0 +1,154 @@
+import base64
+import json
+from functools import reduce
+from types import SimpleNamespace
+
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    """Страница, полученная по курсору, а не по номеру."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _get_field(model, name):
+    if name == 'pk':
+        return model._meta.pk
+    return model._meta.get_field(name)
+
+
+def _parse_ordering(model, ordering):
+    return [
+        (name.lstrip('-'), name.startswith('-'),
+         _get_field(model, name.lstrip('-')))
+        for name in ordering
+    ]
+
+
+def _row_as_object(row, keys):
+    """Строка values() в виде объекта, понятного Field.value_to_string."""
+    return SimpleNamespace(**{
+        field.attname: row[name] if name in row else row[field.attname]
+        for name, _, field in keys
+    })
+
+
+def encode_cursor(obj, ordering, model=None):
+    """
+    Непрозрачный курсор из значений ключей сортировки объекта.
+
+    obj может быть и словарём из values(), тогда нужно передать model.
+    """
+    keys = _parse_ordering(model or type(obj), ordering)
+    if isinstance(obj, dict):
+        obj = _row_as_object(obj, keys)
+    values = [field.value_to_string(obj) for _, _, field in keys]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    keys = _parse_ordering(model, ordering)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise InvalidCursor(cursor)
+        return [
+            field.to_python(value)
+            for (_, _, field), value in zip(keys, values)
+        ]
+    except InvalidCursor:
+        raise
+    except Exception as error:
+        raise InvalidCursor(cursor) from error
+
+
+def _after(keys, values):
+    """
+    Условие «строго после курсора» для составного ключа:
+    a >= x AND ((a > x) OR (a = x AND b > y) OR ...).
+
+    Первое нестрогое сравнение избыточно логически, но позволяет СУБД
+    начать просмотр индекса сразу с нужного места.
+    """
+    first_name, first_descending, _ = keys[0]
+    bound = Q(**{
+        f'{first_name}__{"lte" if first_descending else "gte"}': values[0]
+    })
+    conditions = []
+    for index, (name, descending, _) in enumerate(keys):
+        lookup = 'lt' if descending else 'gt'
+        equal = {
+            prev_name: value
+            for (prev_name, _, _), value in zip(keys[:index], values)
+        }
+        conditions.append(Q(**equal, **{f'{name}__{lookup}': values[index]}))
+    return bound & reduce(lambda left, right: left | right, conditions)
+
+
+def paginate_keyset(queryset, ordering, per_page, cursor=None):
+    """
+    Возвращает страницу queryset, следующую за cursor.
+
+    Стоимость не зависит от глубины страницы: вместо OFFSET строки
+    отбираются по индексу начиная со значений последней показанной записи.
+    ordering должен однозначно упорядочивать записи (заканчиваться на pk).
+    """
+    keys = _parse_ordering(queryset.model, ordering)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, ordering)
+        queryset = queryset.filter(_after(keys, values))
+    object_list = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        next_cursor = encode_cursor(
+            object_list[-1], ordering, queryset.model
+        )
+    return KeysetPage(object_list, next_cursor)
+
+
+class KeysetPaginationMixin:
+    """
+    Подменяет постраничный вывод ListView на курсорный.
+
+    Номер страницы не используется: курсор передаётся
+    в GET-параметре cursor_kwarg.
+    """
+    cursor_kwarg = 'cursor'
+    keyset_ordering = None
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering or self.model._meta.ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = paginate_keyset(
+                queryset,
+                self.get_keyset_ordering(),
+                page_size,
+                self.request.GET.get(self.cursor_kwarg),
+            )
+        except InvalidCursor:
+            raise Http404('Некорректный курсор.')
+        return None, page, page.object_list, page.has_next
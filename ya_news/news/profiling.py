@@ -0,0 +1,188 @@
+"""
+Выборочное профилирование запросов.
+
+ProfilingMiddleware профилирует долю NEWS_PROFILE_SAMPLE_RATE запросов:
+время представления, отрисовки шаблона и каждого SQL-запроса (через
+execute_wrapper всех соединений), а также число повторяющихся запросов.
+Профили пишутся в NEWS_PROFILE_LOG (по строке JSON, с ротацией),
+последние NEWS_PROFILE_RECENT из них отдаёт сотрудникам RecentProfiles.
+
+При нулевой доле промежуточный слой отключается (MiddlewareNotUsed)
+и не стоит ничего.
+"""
+import json
+import logging
+import random
+import time
+from collections import Counter, deque
+from contextlib import ExitStack, nullcontext
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views import View
+
+# Сколько самых долгих запросов к БД сохранять в профиле.
+SLOWEST_QUERIES = 5
+
+logger = logging.getLogger('news.profiling')
+recent_profiles = deque(maxlen=settings.NEWS_PROFILE_RECENT)
+_current = ContextVar('news_profile', default=None)
+_handlers = {}
+
+
+class Profile:
+    """Замеры одного запроса; запросы к БД можно добавлять из потоков."""
+
+    def __init__(self, request):
+        self.request = request
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.render_started = None
+        self.render_finished = None
+        self.queries = []
+
+    def record(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((
+                context['connection'].alias, sql, repr(params),
+                time.perf_counter() - started,
+            ))
+
+    def capture(self):
+        """Контекст, в котором запросы всех соединений потока замеряются."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self.record))
+        return stack
+
+    def as_dict(self, response):
+        finished = time.perf_counter()
+        view_finished = self.render_started or finished
+        counts = Counter((alias, sql, params)
+                         for alias, sql, params, _ in self.queries)
+        slowest = sorted(self.queries, key=lambda query: -query[3])
+        return {
+            'time': timezone.now().isoformat(),
+            'method': self.request.method,
+            'path': self.request.get_full_path(),
+            'status': response.status_code,
+            'total_ms': _ms(finished - self.started),
+            'view_ms': (
+                _ms(view_finished - self.view_started)
+                if self.view_started else None
+            ),
+            'template_ms': (
+                _ms(self.render_finished - self.render_started)
+                if self.render_finished else None
+            ),
+            'sql_ms': _ms(sum(query[3] for query in self.queries)),
+            'queries': len(self.queries),
+            'duplicates': len(self.queries) - len(counts),
+            'slowest': [
+                {'alias': alias, 'sql': sql, 'ms': _ms(duration)}
+                for alias, sql, _, duration in slowest[:SLOWEST_QUERIES]
+            ],
+        }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def capture_queries():
+    """
+    Замер запросов к БД в другом потоке (пул async-представлений).
+
+    Вне профилируемого запроса ничего не делает.
+    """
+    profile = _current.get()
+    return nullcontext() if profile is None else profile.capture()
+
+
+def _file_logger(path):
+    handler = _handlers.get(path)
+    if handler is None:
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=settings.NEWS_PROFILE_LOG_MAX_BYTES,
+            backupCount=settings.NEWS_PROFILE_LOG_BACKUPS,
+            encoding='utf-8',
+        )
+        _handlers[path] = handler
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует случайную долю запросов.
+
+    Стоит последним в MIDDLEWARE: process_view вызывается прямо перед
+    представлением, а process_template_response — перед отрисовкой
+    шаблона.
+    """
+
+    def __init__(self, get_response):
+        self.sample_rate = settings.NEWS_PROFILE_SAMPLE_RATE
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if settings.NEWS_PROFILE_LOG:
+            _file_logger(str(settings.NEWS_PROFILE_LOG))
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        profile = Profile(request)
+        token = _current.set(profile)
+        try:
+            with profile.capture():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        data = profile.as_dict(response)
+        recent_profiles.append(data)
+        if logger.handlers:
+            logger.info(json.dumps(data, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is not None:
+            profile.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        profile = _current.get()
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+            response.add_post_render_callback(self._rendered(profile))
+        return response
+
+    @staticmethod
+    def _rendered(profile):
+        def callback(response):
+            profile.render_finished = time.perf_counter()
+        return callback
+
+
+class RecentProfiles(UserPassesTestMixin, View):
+    """Последние профили этого процесса, от новых к старым."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'sample_rate': settings.NEWS_PROFILE_SAMPLE_RATE,
+            'profiles': list(reversed(recent_profiles)),
+        })
@@ -1,11 +1,107 @@
+from contextlib import contextmanager
 from datetime import timedelta
+from functools import lru_cache
 
 import pytest
 from django.conf import settings
-from django.utils import timezone
+from django.core.cache import cache
+from django.db import connection, transaction
 
+from news import aio
 from news.forms import BAD_WORDS
 from news.models import News, Comment
+from news.pytest_tests.factories import (
+    build_dataset, create_comments, create_news
+)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--scale', default='10',
+        help='Размеры набора данных для test_scale.py через запятую, '
+             'например 10,10000,1000000.',
+    )
+
+
+@lru_cache
+def parse_scales(option):
+    # pytest сравнивает параметр фикстуры с закешированным через is:
+    # одни и те же объекты чисел для всех тестов сохраняют общий набор.
+    return tuple(int(scale) for scale in option.split(','))
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        metafunc.parametrize(
+            'scale', parse_scales(metafunc.config.getoption('scale')),
+            indirect=True, scope='module', ids=lambda scale: f'scale{scale}',
+        )
+
+
+@pytest.fixture(scope='module')
+def scale(request):
+    return request.param
+
+
+@pytest.fixture(scope='module')
+def scaled_dataset(scale, django_db_setup, django_db_blocker):
+    """
+    Набор данных размера scale, общий для тестов модуля.
+
+    Он создаётся один раз в транзакции, каждый тест выполняется
+    в точке сохранения внутри неё и откатывается, а после модуля
+    откатывается и сам набор.
+    """
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            yield build_dataset(scale)
+            transaction.set_rollback(True)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш общий для процесса: каждый тест начинается с пустого."""
+    cache.clear()
+
+
+@pytest.fixture
+def query_budget(monkeypatch):
+    """
+    Проверка бюджета запросов к БД.
+
+    Использование: with query_budget(2, 'news:home'): ...
+    Учитываются и запросы из пула потоков асинхронных представлений.
+    При превышении тест падает со списком выполненных запросов.
+    """
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    call = aio._call
+
+    def call_recorded(func, args, kwargs):
+        with connection.execute_wrapper(record):
+            return call(func, args, kwargs)
+
+    monkeypatch.setattr(aio, '_call', call_recorded)
+
+    @contextmanager
+    def budget(limit, label):
+        queries.clear()
+        with connection.execute_wrapper(record):
+            yield queries
+        if len(queries) > limit:
+            listing = '\n'.join(
+                f'{number}. {sql}' for number, sql in enumerate(queries, 1)
+            )
+            pytest.fail(
+                f'{label}: {len(queries)} запросов при бюджете {limit}:\n'
+                f'{listing}'
+            )
+
+    return budget
 
 
 @pytest.fixture
@@ -40,11 +136,8 @@ def news(author):
 
 @pytest.fixture
 def news_10(author):
-    all_news = []
-    for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1):
-        news = News(title=f'Новость {index}', text='Просто текст.')
-        all_news.append(news)
-    return News.objects.bulk_create(all_news)
+    pks = create_news(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
+    return list(News.objects.filter(pk__in=pks))
 
 
 @pytest.fixture
@@ -58,17 +151,8 @@ def comment(author, news):
 
 @pytest.fixture
 def comments(author, news):
-    all_comments = []
-    for index in range(2):
-        comment = Comment.objects.create(
-            news=news,
-            author=author,
-            text=f'Текст комментария {index}'
-        )
-        comment.created = timezone.now() + timedelta(days=index)
-        comment.save()
-        all_comments.append(comment)
-    return all_comments
+    pks = create_comments((news.pk,), author, 2, step=timedelta(days=1))
+    return list(Comment.objects.filter(pk__in=pks))
 
 
 @pytest.fixture
@@ -0,0 +1,130 @@
+"""
+Фабрики тестовых данных: пользователи, новости и комментарии.
+
+Объекты сохраняются пачками через bulk_create, поэтому и миллион строк
+создаётся за разумное время. pk назначаются заранее, как в загрузчике
+фикстур: bulk_create в SQLite их не возвращает. Фабрики новостей
+и комментариев возвращают диапазон pk, а не объекты, чтобы не держать
+в памяти весь набор.
+"""
+from collections import namedtuple
+from datetime import date, timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db.models import (
+    DateTimeField, DurationField, ExpressionWrapper, F, Max, Value
+)
+from django.utils import timezone
+
+from news.counters import recount
+from news.models import Comment, News
+from news.search import rebuild_index
+
+BATCH_SIZE = 5000
+# Даты новостей повторяются с этим периодом, чтобы при любом объёме
+# набора не выйти за пределы календаря.
+DAYS_SPAN = 10 * 365
+
+Dataset = namedtuple('Dataset', 'author reader news_pks hot_news comment_pks')
+
+
+def _next_pk(model):
+    max_pk = model._default_manager.aggregate(max_pk=Max('pk'))['max_pk']
+    return (max_pk or 0) + 1
+
+
+def _bulk_create(model, objects):
+    iterator = iter(objects)
+    while True:
+        batch = list(islice(iterator, BATCH_SIZE))
+        if not batch:
+            return
+        model._default_manager.bulk_create(batch)
+
+
+def create_users(*usernames, **fields):
+    """Пользователи с указанными именами одним запросом."""
+    user_model = get_user_model()
+    first_pk = _next_pk(user_model)
+    users = [
+        user_model(pk=pk, username=username, **fields)
+        for pk, username in enumerate(usernames, first_pk)
+    ]
+    user_model.objects.bulk_create(users)
+    return users
+
+
+def create_news(count, start=None, **fields):
+    """
+    Новости в количестве count; чем больше номер, тем старше дата.
+
+    Если start не задан, все новости датированы сегодняшним днём.
+    """
+    first_pk = _next_pk(News)
+    _bulk_create(News, (
+        News(
+            pk=first_pk + index,
+            title=f'Новость {index}',
+            text='Просто текст.',
+            date=(
+                start - timedelta(days=index % DAYS_SPAN)
+                if start else date.today()
+            ),
+            **fields,
+        )
+        for index in range(count)
+    ))
+    return range(first_pk, first_pk + count)
+
+
+def create_comments(news_pks, author, count, start=None,
+                    step=timedelta(minutes=1)):
+    """
+    Комментарии в количестве count, по кругу — к новостям news_pks.
+
+    Время создания растёт на step от start (по умолчанию — сейчас).
+    Счётчики новостей не обновляются: после создания нужен recount().
+    """
+    start = start or timezone.now()
+    first_pk = _next_pk(Comment)
+    pks = range(first_pk, first_pk + count)
+    _bulk_create(Comment, (
+        Comment(
+            pk=first_pk + index,
+            news_id=news_pks[index % len(news_pks)],
+            author=author,
+            text=f'Текст комментария {index}',
+        )
+        for index in range(count)
+    ))
+    # auto_now_add при вставке ставит текущее время, поэтому нужное
+    # время выставляем одним UPDATE: start + step * (pk - first_pk).
+    # Длительности в SQLite хранятся в микросекундах.
+    offset = ExpressionWrapper(
+        (F('pk') - first_pk) * (step // timedelta(microseconds=1)),
+        output_field=DurationField(),
+    )
+    Comment.objects.filter(pk__gte=first_pk).update(
+        created=ExpressionWrapper(
+            Value(start, DateTimeField()) + offset,
+            output_field=DateTimeField(),
+        )
+    )
+    return pks
+
+
+def build_dataset(scale):
+    """
+    Набор из scale новостей и scale комментариев.
+
+    Комментарии достаются одной новости из ста, самой свежей из них —
+    hot_news. Счётчики комментариев и поисковый индекс обновлены.
+    """
+    author, reader = create_users('Автор', 'Читатель')
+    news_pks = create_news(scale, start=date.today())
+    commented = news_pks[:max(1, scale // 100)]
+    comment_pks = create_comments(commented, author, scale)
+    recount(News.objects.filter(pk__range=(commented[0], commented[-1])))
+    rebuild_index()
+    return Dataset(author, reader, news_pks, commented[0], comment_pks)
@@ -1,7 +1,22 @@
+import threading
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
 from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_init
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from news import views
+from news.cache import cache_set, cache_stats, invalidate_news
+from news.counters import recount
 from news.forms import CommentForm
+from news.models import Comment, News
+from news.templatetags import news_cache
 
 
 def test_home_page(client, news_10):
@@ -26,6 +41,133 @@ def test_news_order(client, news_10):
     assert all_dates == sorted_dates
 
 
+@pytest.mark.parametrize('comments_per_news', (1, 50))
+def test_home_page_comment_count(client, author, news_10, comments_per_news):
+    """
+    Главная страница показывает число комментариев, не загружая сами
+    комментарии: число запросов не зависит от количества комментариев.
+    """
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Текст')
+        for news in News.objects.all()
+        for _ in range(comments_per_news)
+    )
+    # bulk_create обходит представления, счётчики пересчитываем сами.
+    recount(News.objects.all())
+    loaded_comments = []
+
+    def count_instances(sender, instance, **kwargs):
+        loaded_comments.append(instance)
+
+    post_init.connect(count_instances, sender=Comment)
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('news:home'))
+    finally:
+        post_init.disconnect(count_instances, sender=Comment)
+    assert len(queries) == 1
+    assert loaded_comments == []
+    for news in response.context['object_list']:
+        assert news.comment_count == comments_per_news
+    assert f'Комментариев: {comments_per_news}' in response.content.decode()
+
+
+def test_home_page_is_cached_for_anonymous(client, author, news):
+    """
+    Повторный запрос главной страницы анонимом обслуживается из кеша,
+    а новый комментарий сбрасывает кеш.
+    """
+    url = reverse('news:home')
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        cached_response = client.get(url)
+    # Только новости страницы для её версии; шаблон не отрисовывается.
+    assert len(queries) == 1
+    assert cache_stats()['hits'] == 1
+    assert 'Комментариев' not in cached_response.content.decode()
+    author_client = Client()
+    author_client.force_login(author)
+    author_client.post(
+        reverse('news:detail', args=(news.id,)), {'text': 'Текст'}
+    )
+    response = client.get(url)
+    assert 'Комментариев: 1' in response.content.decode()
+
+
+def test_page_rendered_before_invalidation_is_not_cached(
+        client, news, monkeypatch
+):
+    """Страница, отрисованная до сброса кеша, после него не отдаётся."""
+
+    def invalidate_then_set(key, value):
+        invalidate_news(news.pk)
+        cache_set(key, value)
+
+    url = reverse('news:home')
+    monkeypatch.setattr(views, 'cache_set', invalidate_then_set)
+    client.get(url)
+    News.objects.filter(pk=news.pk).update(title='Новый заголовок')
+    assert 'Новый заголовок' in client.get(url).content.decode()
+
+
+def test_archive_pages_through_all_news(client, news_10):
+    """
+    Архив по курсору отдаёт все новости ровно по одному разу
+    в порядке от свежих к старым.
+    """
+    url = reverse('news:archive')
+    expected = list(News.objects.values_list('pk', flat=True))
+    seen = []
+    cursor = None
+    while True:
+        response = client.get(url, {'cursor': cursor} if cursor else None)
+        page = response.context['page_obj']
+        assert len(page) <= settings.NEWS_COUNT_ON_ARCHIVE_PAGE
+        seen.extend(news.pk for news in page)
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == expected
+
+
+def test_archive_rejects_broken_cursor(client):
+    """Испорченный курсор приводит к 404, а не к ошибке сервера."""
+    response = client.get(reverse('news:archive'), {'cursor': 'garbage'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_search_ranks_and_follows_changes(client, db):
+    """
+    Поиск находит новости по началу слова, ставит выше более
+    релевантные и учитывает изменения и удаление новостей.
+    """
+    url = reverse('news:search')
+    once = News.objects.create(title='Погода', text='Завтра будет дождь.')
+    twice = News.objects.create(title='Дожди', text='Дождь и снова дождь.')
+    News.objects.create(title='Спорт', text='Матч состоялся.')
+    response = client.get(url, {'q': 'дожд'})
+    assert [news.pk for news in response.context['object_list']] == [
+        twice.pk, once.pk
+    ]
+    once.text = 'Завтра будет солнечно.'
+    once.save()
+    twice.delete()
+    response = client.get(url, {'q': 'дожд'})
+    assert list(response.context['object_list']) == []
+
+
+def test_search_index_rebuild(client, news_10):
+    """После массовой загрузки индекс пересобирается командой."""
+    url = reverse('news:search')
+    assert client.get(url, {'q': 'новость'}).context['paginator'].count == 0
+    call_command('rebuild_search_index', stdout=StringIO())
+    response = client.get(url, {'q': 'новость'})
+    assert response.context['paginator'].count == len(news_10)
+    assert len(response.context['object_list']) == (
+        settings.NEWS_COUNT_ON_SEARCH_PAGE
+    )
+
+
 def test_detail_page_contains_form(author_client, news):
     """
     На странице отдельной новости для
@@ -56,8 +198,234 @@ def test_comments_order(client, news, comments):
     url = reverse('news:detail', args=(news.id,))
     response = client.get(url)
     assert 'news' in response.context
-    news = response.context['news']
-    all_comments = news.comment_set.all().order_by('created')
-    all_date_created = [comment.created for comment in all_comments]
+    comments_page = response.context['comments_page']
+    all_date_created = [comment.created for comment in comments_page]
     sorted_date = sorted(all_date_created)
     assert all_date_created == sorted_date
+    assert len(all_date_created) == len(comments)
+
+
+def test_comments_are_paginated(client, author, news):
+    """
+    На странице новости выводится только первая страница комментариев,
+    остальные подгружаются фрагментами по курсору.
+    """
+    per_page = settings.COMMENTS_COUNT_ON_NEWS_PAGE
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(per_page * 2 + 1)
+    )
+    expected = list(
+        Comment.objects.order_by('created', 'pk').values_list('pk', flat=True)
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('news:detail', args=(news.id,)))
+    # Валидаторы для ETag, сама новость и страница комментариев.
+    assert len(queries) == 3
+    page = response.context['comments_page']
+    seen = [comment.pk for comment in page]
+    assert len(seen) == per_page
+    url = reverse('news:comments', args=(news.id,))
+    while page.has_next:
+        response = client.get(url, {'cursor': page.next_cursor})
+        page = response.context['page_obj']
+        seen.extend(comment.pk for comment in page)
+    assert seen == expected
+
+
+def test_api_news_list_pages_through_all_news(client, news_10):
+    """API отдаёт новости словарями, страницами по курсору."""
+    url = reverse('news:api_list')
+    seen = []
+    while url:
+        data = client.get(url).json()
+        assert set(data['results'][0]) == {
+            'id', 'title', 'text', 'date', 'comment_count'
+        }
+        seen.extend(item['id'] for item in data['results'])
+        url = data['next']
+    assert seen == list(News.objects.values_list('pk', flat=True))
+
+
+def test_api_comments(client, news, comments):
+    url = reverse('news:api_comments', args=(news.id,))
+    data = client.get(url).json()
+    assert [item['id'] for item in data['results']] == [
+        comment.pk for comment in comments
+    ]
+    author = data['results'][0]['author__username']
+    assert author == comments[0].author.username
+    assert data['next'] is None
+
+
+@pytest.mark.parametrize('name', ('news:api_detail', 'news:api_comments'))
+def test_api_not_modified(client, django_assert_num_queries, news, comment,
+                          name):
+    """
+    Повторный запрос с If-None-Match стоит одного запроса к БД,
+    а любое изменение комментариев меняет ETag.
+    """
+    url = reverse(name, args=(news.id,))
+    response = client.get(url)
+    etag = response['ETag']
+    assert response.has_header('Last-Modified')
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    response = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    comment.text = 'Исправленный текст'
+    comment.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+def test_api_list_not_modified_until_news_added(client, news):
+    url = reverse('news:api_list')
+    etag = client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    News.objects.create(title='Свежая новость', text='Текст')
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_api_unknown_news(client, db):
+    url = reverse('news:api_detail', args=(1,))
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_home_page_conditional_get(author_client, news):
+    """
+    Главная отвечает 304 за один запрос к БД, пока ничего не изменилось;
+    анониму страница отдаётся с публичным Cache-Control.
+    """
+    client = Client()
+    url = reverse('news:home')
+    response = client.get(url)
+    assert response['Cache-Control'] == (
+        f'public, max-age={settings.NEWS_HTTP_CACHE_MAX_AGE}'
+    )
+    assert 'Cookie' in response['Vary']
+    etag = response['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert len(queries) == 1
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['Cache-Control'] == 'private, no-cache'
+    news.title = 'Новый заголовок'
+    news.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize('name', ('news:home', 'news:async_home'))
+def test_home_page_sees_changes_of_other_processes(transactional_db, news,
+                                                   name):
+    """
+    Изменение в БД без сброса кеша этого процесса (его сделал другой
+    процесс) меняет ETag и не отдаётся из кеша страниц.
+    """
+    client = Client()
+    url = reverse(name)
+    etag = client.get(url)['ETag']
+    News.objects.filter(pk=news.pk).update(comment_count=5)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Комментариев: 5' in response.content.decode()
+
+
+def test_detail_etag_follows_comment_count(author_client, author, news):
+    """Скрытие не последнего комментария тоже меняет ETag новости."""
+    first, _ = (
+        Comment.objects.create(news=news, author=author, text='Текст')
+        for _ in range(2)
+    )
+    recount(News.objects.all())
+    url = reverse('news:detail', args=(news.id,))
+    etag = author_client.get(url)['ETag']
+    Comment.objects.filter(pk=first.pk).update(flagged=True)
+    recount(News.objects.all())
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_detail_page_conditional_get(author_client, author, news):
+    url = reverse('news:detail', args=(news.id,))
+    response = author_client.get(url)
+    etag = response['ETag']
+    assert response['Cache-Control'] == 'private, no-cache'
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    Comment.objects.create(news=news, author=author, text='Текст')
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize(
+    'sync_name, async_name',
+    (('news:home', 'news:async_home'), ('news:detail', 'news:async_detail')),
+)
+def test_async_pages_match_sync(transactional_db, sync_name, async_name,
+                                author, news, comment):
+    """
+    Асинхронные версии страниц отдают ту же разметку и тот же ETag.
+
+    Запросы к БД идут из пула потоков, поэтому данные должны быть
+    зафиксированы: используется transactional_db.
+    """
+    args = () if sync_name == 'news:home' else (news.id,)
+    sync_response = Client().get(reverse(sync_name, args=args))
+    async_response = Client().get(reverse(async_name, args=args))
+    assert async_response.status_code == HTTPStatus.OK
+    assert async_response.content == sync_response.content
+    assert async_response['ETag'] == sync_response['ETag']
+    response = Client().get(
+        reverse(async_name, args=args),
+        HTTP_IF_NONE_MATCH=sync_response['ETag'],
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_async_comments_page(transactional_db, author, news):
+    per_page = settings.COMMENTS_COUNT_ON_NEWS_PAGE
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(per_page + 1)
+    )
+    response = Client().get(reverse('news:async_detail', args=(news.id,)))
+    url = reverse('news:async_comments', args=(news.id,))
+    assert url in response.content.decode()
+    cursor = response.context['comments_page'].next_cursor
+    response = Client().get(url, {'cursor': cursor})
+    assert response.content.decode().count('Комментарий') == 1
+    response = Client().get(url, {'cursor': 'broken'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_async_detail_unknown_news(transactional_db):
+    response = Client().get(reverse('news:async_detail', args=(1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_async_home_renders_off_loop(transactional_db, monkeypatch, news):
+    """Кеш карточек не читается и не пишется в цикле событий."""
+    threads = []
+
+    def tracked(func):
+        def wrapper(*args):
+            threads.append(threading.current_thread().name)
+            return func(*args)
+        return wrapper
+
+    monkeypatch.setattr(news_cache, 'cache_get', tracked(news_cache.cache_get))
+    monkeypatch.setattr(news_cache, 'cache_set', tracked(news_cache.cache_set))
+    response = Client().get(reverse('news:async_home'))
+    assert response.status_code == HTTPStatus.OK
+    assert threads
+    assert all(thread.startswith('news-db') for thread in threads)
@@ -1,10 +1,35 @@
+import csv
+import gzip
+import json
+import os
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
 
+import pytest
 from pytest_django.asserts import assertRedirects, assertFormError
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import Client
 from django.urls import reverse
+from django.utils import timezone
 
-from news.models import Comment
+from news.counters import recount
+from news.loader import iter_json_array
+from news.models import Comment, News
+from news.profiling import Profile, ProfilingMiddleware, recent_profiles
 from news.forms import WARNING
+from news.moderation import WordMatcher, get_matcher
+from news.routers import (
+    STICKY_COOKIE, ReplicaRouter, ReplicaStickinessMiddleware
+)
+from news.pytest_tests.factories import create_comments
+from news.search import search_news
 
 
 def test_user_can_create_comment(author_client, author, news, comment_text):
@@ -80,3 +105,335 @@ def test_user_cant_edit_comment_of_another_user(reader_client, comment,
     assert response.status_code == HTTPStatus.NOT_FOUND
     comment.refresh_from_db()
     assert comment.text != new_comment_text
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    (
+        ('ты редиска!', 'редиска'),
+        ('какой негодяйчик', 'негодяй'),
+        ('редис и негодник', None),
+        ('', None),
+    ),
+)
+def test_word_matcher(text, expected):
+    """Автомат находит запрещённое слово в любом месте текста."""
+    matcher = WordMatcher(('редиска', 'негодяй', 'дяйка'))
+    assert matcher.search(text) == expected
+
+
+def test_word_matcher_finds_word_inside_longer_one():
+    """Короткое слово находится и внутри незавершённого длинного."""
+    matcher = WordMatcher(('abcd', 'bc'))
+    assert matcher.search('xabcx') == 'bc'
+
+
+def test_bad_words_are_loaded_from_file(settings, tmp_path, author_client,
+                                        news):
+    """Словарь читается из файла и пересобирается при его изменении."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь\nбука\n', encoding='utf-8')
+    settings.NEWS_BAD_WORDS_FILE = str(words_file)
+    url = reverse('news:detail', args=(news.id,))
+    response = author_client.post(url, {'text': 'Бука!'})
+    assertFormError(response, 'form', 'text', errors=WARNING)
+    words_file.write_text('злюка\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 0))
+    assert get_matcher().search('бука') is None
+    assert get_matcher().search('ну и злюка') == 'злюка'
+
+
+@pytest.mark.parametrize('action', ('flag', 'delete'))
+def test_remoderate_comments(author, news, bad_comment_text, action):
+    """Команда находит старые комментарии с запрещёнными словами."""
+    clean = Comment.objects.create(news=news, author=author, text='text')
+    bad = Comment.objects.create(
+        news=news, author=author, text=bad_comment_text
+    )
+    call_command(
+        'remoderate_comments', action=action, range_size=1, stdout=StringIO()
+    )
+    clean.refresh_from_db()
+    assert clean.flagged is False
+    if action == 'delete':
+        assert not Comment.objects.filter(pk=bad.pk).exists()
+    else:
+        bad.refresh_from_db()
+        assert bad.flagged is True
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert news.last_commented_at == clean.created
+
+
+def test_remoderate_comments_resumes_from_state(author, news, tmp_path,
+                                                bad_comment_text):
+    """Повторный запуск продолжает проверку с сохранённого pk."""
+    old = Comment.objects.create(
+        news=news, author=author, text=bad_comment_text
+    )
+    new = Comment.objects.create(
+        news=news, author=author, text=bad_comment_text
+    )
+    state_file = tmp_path / 'state'
+    state_file.write_text(str(old.pk))
+    call_command(
+        'remoderate_comments', state_file=str(state_file), stdout=StringIO()
+    )
+    old.refresh_from_db()
+    new.refresh_from_db()
+    assert old.flagged is False
+    assert new.flagged is True
+    assert state_file.read_text() == str(new.pk)
+
+
+def test_flagged_comments_are_hidden(client, author, news, comment):
+    """Скрытые модератором комментарии не показываются на сайте."""
+    Comment.objects.filter(pk=comment.pk).update(flagged=True)
+    response = client.get(reverse('news:detail', args=(news.id,)))
+    assert list(response.context['comments_page']) == []
+
+
+def test_export_is_available_only_for_staff(reader_client):
+    """Выгрузку всех новостей могут получить только сотрудники."""
+    response = reader_client.get(reverse('news:export'))
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.parametrize('compress', (False, True))
+def test_export_news_ndjson(admin_client, news, comment, compress):
+    """Выгрузка NDJSON содержит все новости и комментарии."""
+    response = admin_client.get(
+        reverse('news:export'), {'gzip': '1' if compress else '0'}
+    )
+    assert response.streaming
+    content = b''.join(response.streaming_content)
+    if compress:
+        content = gzip.decompress(content)
+    records = [json.loads(line) for line in content.decode().splitlines()]
+    assert [(record['model'], record['id']) for record in records] == [
+        ('news.news', news.id), ('news.comment', comment.id)
+    ]
+    assert records[1]['text'] == comment.text
+
+
+def test_export_news_csv_command(tmp_path, news, comment):
+    """Команда выгружает новости и комментарии в CSV."""
+    output = tmp_path / 'news.csv'
+    call_command('export_news', format='csv', output=str(output))
+    with open(output, encoding='utf-8', newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [(row['model'], row['id']) for row in rows] == [
+        ('news.news', str(news.id)), ('news.comment', str(comment.id))
+    ]
+    assert rows[0]['title'] == news.title
+
+
+@pytest.mark.parametrize('read_size', (1, 7, 64 * 1024))
+def test_iter_json_array_streams_objects(read_size):
+    """Массив разбирается по объектам при любом размере куска чтения."""
+    objects = [{'a': 1}, {'b': ['x', 'y']}, {'c': 'строка, с ] и ['}]
+    stream = StringIO(' [\n' + ',\n'.join(map(json.dumps, objects)) + ']\n')
+    assert list(iter_json_array(stream, read_size)) == objects
+
+
+@pytest.mark.parametrize('skip_signals', (False, True))
+def test_load_news_fixture(author, skip_signals):
+    """Команда загружает news.json, как loaddata."""
+    fixture = Path(settings.BASE_DIR) / 'news' / 'fixtures' / 'news.json'
+    expected = len(json.loads(fixture.read_text(encoding='utf-8')))
+    call_command(
+        'load_news_fixture', str(fixture), batch_size=3,
+        skip_signals=skip_signals, stdout=StringIO(),
+    )
+    assert News.objects.count() == expected
+    indexed = search_news(News.objects.first().title)
+    assert bool(indexed.count()) is not skip_signals
+
+
+def test_load_news_fixture_with_comments(tmp_path, author):
+    """Комментарии ссылаются на новости с явными pk из той же фикстуры."""
+    fixture = tmp_path / 'fixture.json'
+    fixture.write_text(json.dumps([
+        {'model': 'news.comment', 'pk': 7, 'fields': {
+            'news': 5, 'author': author.pk, 'text': 'Текст',
+            'created': '2022-11-01T10:00:00Z',
+        }},
+        {'model': 'news.news', 'pk': 5, 'fields': {
+            'title': 'Заголовок', 'text': 'Текст', 'date': '2022-11-01',
+        }},
+    ]), encoding='utf-8')
+    call_command('load_news_fixture', str(fixture), stdout=StringIO())
+    assert Comment.objects.get(pk=7).news == News.objects.get(pk=5)
+    assert News.objects.get(pk=5).comment_count == 1
+
+
+def test_load_news_fixture_twice_updates(tmp_path, author):
+    """Повторная загрузка, как и в loaddata, обновляет существующие объекты."""
+    fixture = tmp_path / 'fixture.json'
+
+    def load(title):
+        fixture.write_text(json.dumps([
+            {'model': 'news.news', 'pk': 1, 'fields': {
+                'title': title, 'text': 'Текст', 'date': '2022-11-01',
+            }},
+        ]), encoding='utf-8')
+        call_command('load_news_fixture', str(fixture), stdout=StringIO())
+
+    load('Заголовок')
+    Comment.objects.create(news_id=1, author=author, text='Текст')
+    recount(News.objects.all())
+    load('Новый заголовок')
+    news = News.objects.get()
+    assert (news.title, news.comment_count) == ('Новый заголовок', 1)
+    assert search_news('новый').count() == 1
+
+
+def test_sqlite_pragmas_applied_to_new_connections(db, settings):
+    """PRAGMA из SQLITE_PRAGMAS применяются к каждому новому соединению."""
+    settings.SQLITE_PRAGMAS = {'cache_size': -1234, 'busy_timeout': 4321}
+    new_connection = connections.create_connection('default')
+    try:
+        with new_connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            assert cursor.fetchone()[0] == -1234
+            cursor.execute('PRAGMA busy_timeout')
+            assert cursor.fetchone()[0] == 4321
+    finally:
+        new_connection.close()
+
+
+def test_replica_router(settings):
+    """Чтение news идёт на реплики, запись и другие приложения — нет."""
+    settings.NEWS_DB_REPLICAS = ['replica1', 'replica2']
+    router = ReplicaRouter()
+    assert router.db_for_read(News) in settings.NEWS_DB_REPLICAS
+    assert router.db_for_write(News) == 'default'
+    assert router.db_for_read(get_user_model()) is None
+    assert router.allow_migrate('replica1', 'news') is False
+    settings.NEWS_DB_REPLICAS = []
+    assert router.db_for_read(News) is None
+
+
+@pytest.mark.parametrize(
+    'method, cookies, expected',
+    (
+        ('get', {}, 'replica1'),
+        ('post', {}, 'default'),
+        ('get', {STICKY_COOKIE: '1'}, 'default'),
+    ),
+)
+def test_replica_stickiness(settings, rf, method, cookies, expected):
+    """После изменяющего запроса клиент какое-то время читает с основной БД."""
+    settings.NEWS_DB_REPLICAS = ['replica1']
+    databases = []
+
+    def get_response(request):
+        databases.append(ReplicaRouter().db_for_read(News))
+        return HttpResponse()
+
+    request = getattr(rf, method)('/')
+    request.COOKIES.update(cookies)
+    response = ReplicaStickinessMiddleware(get_response)(request)
+    assert databases == [expected]
+    assert (STICKY_COOKIE in response.cookies) is (method == 'post')
+    assert ReplicaRouter().db_for_read(News) == 'replica1'
+
+
+def test_comment_counters_follow_views(author_client, author, news):
+    """Добавление и удаление комментария меняют счётчики новости."""
+    url = reverse('news:detail', args=(news.id,))
+    for text in ('Первый', 'Второй'):
+        author_client.post(url, {'text': text})
+    first, second = Comment.objects.order_by('created', 'pk')
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    assert news.last_commented_at == second.created
+    author_client.post(reverse('news:delete', args=(second.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert news.last_commented_at == first.created
+
+
+def test_create_comments_sets_created(author, news):
+    """Фабрика задаёт время создания, не отключая auto_now_add."""
+    start = timezone.now() - timedelta(days=1)
+    pks = create_comments((news.pk,), author, 3, start=start)
+    assert list(
+        Comment.objects.filter(pk__in=pks).values_list('created', flat=True)
+    ) == [start + timedelta(minutes=index) for index in range(3)]
+    assert Comment._meta.get_field('created').auto_now_add
+
+
+def test_repair_comment_counters(author, news_10):
+    """Команда исправляет разошедшиеся счётчики."""
+    news = News.objects.first()
+    comment = Comment.objects.create(news=news, author=author, text='Текст')
+    Comment.objects.create(
+        news=news, author=author, text='Скрытый', flagged=True
+    )
+    News.objects.update(comment_count=7)
+    call_command('repair_comment_counters', range_size=3, stdout=StringIO())
+    assert list(
+        News.objects.exclude(pk=news.pk).values_list(
+            'comment_count', 'last_commented_at'
+        ).order_by().distinct()
+    ) == [(0, None)]
+    news.refresh_from_db()
+    assert (news.comment_count, news.last_commented_at) == (
+        1, comment.created
+    )
+
+
+def test_profiling_disabled_by_default():
+    """При нулевой доле промежуточный слой не подключается."""
+    with pytest.raises(MiddlewareNotUsed):
+        ProfilingMiddleware(lambda request: HttpResponse())
+
+
+def test_profile_counts_duplicate_queries(rf):
+    profile = Profile(rf.get('/'))
+    context = {'connection': connections['default']}
+    for sql, params in (('SELECT 1', ()), ('SELECT 1', ()),
+                        ('SELECT 1', (1,)), ('SELECT 2', ())):
+        profile.record(lambda *args: None, sql, params, False, context)
+    data = profile.as_dict(HttpResponse())
+    assert (data['queries'], data['duplicates']) == (4, 1)
+    assert len(data['slowest']) == 4
+
+
+def test_sampled_request_is_profiled(db, settings, tmp_path, news, comments):
+    """Профиль страницы новости попадает в журнал и в последние профили."""
+    settings.NEWS_PROFILE_SAMPLE_RATE = 1
+    settings.NEWS_PROFILE_LOG = tmp_path / 'profiles.log'
+    recent_profiles.clear()
+    Client().get(reverse('news:detail', args=(news.id,)))
+    data, = recent_profiles
+    assert data['path'] == reverse('news:detail', args=(news.id,))
+    assert data['status'] == HTTPStatus.OK
+    assert (data['queries'], data['duplicates']) == (3, 0)
+    assert data['view_ms'] is not None
+    assert data['template_ms'] is not None
+    logged = json.loads(settings.NEWS_PROFILE_LOG.read_text('utf-8'))
+    assert logged['path'] == data['path']
+
+
+@pytest.mark.parametrize('name', ('profiles', 'cache_stats'))
+@pytest.mark.parametrize('is_staff, status', (
+    (False, HTTPStatus.FORBIDDEN), (True, HTTPStatus.OK),
+))
+def test_staff_only_stats(author, client, is_staff, status, name):
+    author.is_staff = is_staff
+    author.save()
+    client.force_login(author)
+    assert client.get(reverse(name)).status_code == status
+
+
+def test_cache_stats_view(admin_client, news):
+    """Второй запрос главной анонимом — попадание в кеш страниц."""
+    url = reverse('news:home')
+    Client().get(url)
+    Client().get(url)
+    data = admin_client.get(reverse('cache_stats')).json()
+    assert set(data) == {'hits', 'misses', 'hit_ratio'}
+    assert data['hits'] >= 1
+    assert data['hit_ratio'] == data['hits'] / (data['hits'] + data['misses'])
@@ -0,0 +1,105 @@
+"""
+Бюджеты запросов к БД для каждого маршрута news.
+
+Число запросов не должно зависеть от объёма данных, поэтому каждый
+маршрут проверяется на маленьком и на большом наборе новостей.
+"""
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from news import urls
+from news.counters import recount
+from news.models import Comment, News
+from news.search import rebuild_index
+
+# Маршрут → (клиент, бюджет). Клиенты: anonymous, author — автор
+# комментария, staff — сотрудник. У авторизованных два запроса уходят
+# на сессию и пользователя.
+BUDGETS = {
+    'news:home': ('anonymous', 1),
+    'news:archive': ('anonymous', 1),
+    'news:search': ('anonymous', 3),
+    'news:export': ('staff', 4),
+    'news:detail': ('anonymous', 3),
+    'news:comments': ('anonymous', 1),
+    'news:delete': ('author', 3),
+    'news:edit': ('author', 3),
+    'news:api_list': ('anonymous', 2),
+    'news:api_detail': ('anonymous', 2),
+    'news:api_comments': ('anonymous', 2),
+    'news:async_home': ('anonymous', 1),
+    'news:async_detail': ('anonymous', 3),
+    'news:async_comments': ('anonymous', 1),
+}
+SIZES = (1, 25)
+
+
+def test_every_route_has_budget():
+    names = {f'news:{pattern.name}' for pattern in urls.urlpatterns}
+    assert names == set(BUDGETS)
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f'size{size}')
+def dataset(request, django_user_model):
+    """Новости и комментарии к ним, среди них комментарий автора."""
+    size = request.param
+    author = django_user_model.objects.create(username='Автор')
+    staff = django_user_model.objects.create(username='Сотрудник',
+                                             is_staff=True)
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости.')
+        for index in range(size)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for news in News.objects.all()
+        for index in range(size)
+    )
+    recount(News.objects.all())
+    rebuild_index()
+    yield {
+        'news': News.objects.first(),
+        'comment': Comment.objects.filter(author=author).first(),
+        'users': {'author': author, 'staff': staff},
+    }
+    # После transactional_db таблицы очищаются, а индекс поиска — нет.
+    rebuild_index()
+
+
+def route_args(name, data):
+    if name in ('news:delete', 'news:edit'):
+        return (data['comment'].pk,)
+    if name in ('news:home', 'news:archive', 'news:search', 'news:export',
+                'news:api_list', 'news:async_home'):
+        return ()
+    return (data['news'].pk,)
+
+
+def check_budget(name, data, query_budget):
+    kind, limit = BUDGETS[name]
+    client = Client()
+    if kind != 'anonymous':
+        client.force_login(data['users'][kind])
+    url = reverse(name, args=route_args(name, data))
+    params = {'q': 'новость'} if name == 'news:search' else {}
+    with query_budget(limit, name):
+        response = client.get(url, params)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    'name', [name for name in BUDGETS if not name.startswith('news:async')]
+)
+def test_query_budget(db, name, dataset, query_budget):
+    check_budget(name, dataset, query_budget)
+
+
+@pytest.mark.parametrize(
+    'name', [name for name in BUDGETS if name.startswith('news:async')]
+)
+def test_async_query_budget(transactional_db, name, dataset, query_budget):
+    """Асинхронные представления читают БД из других потоков."""
+    check_budget(name, dataset, query_budget)
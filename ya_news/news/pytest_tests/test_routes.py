@@ -8,20 +8,30 @@ from pytest_django.asserts import assertRedirects
     'name, args',
     (
         ('news:home', None),
+        ('news:archive', None),
+        ('news:search', None),
         ('users:login', None),
         ('users:logout', None),
         ('users:signup', None),
         ('news:detail', (1,)),
+        ('news:comments', (1,)),
+        ('news:api_list', None),
+        ('news:api_detail', (1,)),
+        ('news:api_comments', (1,)),
     ),
 )
 def test_pages_availability_for_anonymous_user(client, name, args, news):
     """
     Доступность страниц для анонимного пользователя:
     - Главная страница
+    - Архив новостей
+    - Поиск по новостям
     - Страница логина
     - Страница логаута
     - Страница регистрации
     - Страница отдельной новости
+    - Фрагмент со следующими комментариями к новости
+    - JSON API: список новостей, новость и её комментарии
     """
     url = reverse(name, args=args)
     response = client.get(url)
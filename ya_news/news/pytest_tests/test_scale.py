@@ -0,0 +1,97 @@
+"""
+Проверки страниц и логики на наборе данных разного размера.
+
+Размеры задаются опцией --scale (по умолчанию 10), например:
+pytest news/pytest_tests/test_scale.py --scale=10,10000,1000000
+Набор строится один раз на размер, а каждый тест откатывает свои
+изменения, поэтому время прогона определяют сами проверки.
+"""
+from datetime import date
+
+import pytest
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+from news.models import Comment, News
+
+
+@pytest.fixture
+def author_client(scaled_dataset):
+    client = Client()
+    client.force_login(scaled_dataset.author)
+    return client
+
+
+def test_home_page(db, scaled_dataset, query_budget):
+    """На главной — самые свежие новости, за один запрос."""
+    with query_budget(1, 'news:home'):
+        response = Client().get(reverse('news:home'))
+    dates = [news.date for news in response.context['object_list']]
+    assert len(dates) == min(
+        len(scaled_dataset.news_pks), settings.NEWS_COUNT_ON_HOME_PAGE
+    )
+    assert dates == sorted(dates, reverse=True)
+    assert dates[0] == date.today()
+
+
+def test_news_page_comments(db, scaled_dataset, query_budget):
+    """Первая страница комментариев — самые ранние, по порядку."""
+    pk = scaled_dataset.hot_news
+    with query_budget(3, 'news:detail'):
+        response = Client().get(reverse('news:detail', args=(pk,)))
+    page = response.context['comments_page']
+    expected = Comment.objects.filter(news_id=pk).order_by('created', 'pk')
+    expected = expected[:settings.COMMENTS_COUNT_ON_NEWS_PAGE]
+    assert [comment.pk for comment in page.object_list] == [
+        comment.pk for comment in expected
+    ]
+    assert response.context['news'].comment_count == (
+        Comment.objects.filter(news_id=pk).count()
+    )
+
+
+def test_archive_pages_do_not_overlap(db, scaled_dataset):
+    url = reverse('news:archive')
+    client = Client()
+    first = client.get(url).context['page_obj']
+    assert len(first) == min(
+        len(scaled_dataset.news_pks), settings.NEWS_COUNT_ON_ARCHIVE_PAGE
+    )
+    if not first.has_next:
+        return
+    second = client.get(url, {'cursor': first.next_cursor})
+    second_pks = {news.pk for news in second.context['page_obj']}
+    assert second_pks
+    assert not second_pks & {news.pk for news in first}
+
+
+def test_search_finds_every_news(db, scaled_dataset):
+    response = Client().get(reverse('news:search'), {'q': 'новость'})
+    assert response.context['paginator'].count == len(
+        scaled_dataset.news_pks
+    )
+
+
+def test_api_list_next_page(db, scaled_dataset):
+    data = Client().get(reverse('news:api_list')).json()
+    has_more = len(scaled_dataset.news_pks) > len(data['results'])
+    assert (data['next'] is not None) == has_more
+
+
+def test_comment_updates_counter(db, scaled_dataset, author_client):
+    """Новый комментарий увеличивает счётчик новости на единицу."""
+    pk = scaled_dataset.hot_news
+    before = News.objects.get(pk=pk).comment_count
+    author_client.post(reverse('news:detail', args=(pk,)),
+                       {'text': 'Ещё комментарий'})
+    assert News.objects.get(pk=pk).comment_count == before + 1
+
+
+def test_delete_comment_updates_counter(db, scaled_dataset, author_client):
+    pk = scaled_dataset.hot_news
+    comment = Comment.objects.filter(news_id=pk).first()
+    before = News.objects.get(pk=pk).comment_count
+    author_client.post(reverse('news:delete', args=(comment.pk,)))
+    assert News.objects.get(pk=pk).comment_count == before - 1
+    assert not Comment.objects.filter(pk=comment.pk).exists()
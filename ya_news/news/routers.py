@@ -0,0 +1,72 @@
+"""
+Чтение с реплик и запись в основную БД для моделей приложения news.
+
+Реплики перечислены в settings.NEWS_DB_REPLICAS. Пока запрос помечен
+как «прилипший» к основной БД (см. ReplicaStickinessMiddleware), чтение
+тоже идёт в неё: автор сразу видит свой комментарий, даже если реплика
+ещё не догнала основную БД.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+APP_LABELS = ('news',)
+STICKY_COOKIE = 'news_primary'
+
+_use_primary = ContextVar('news_use_primary', default=False)
+
+
+class ReplicaRouter:
+
+    def _routed(self, model):
+        return model._meta.app_label in APP_LABELS
+
+    def db_for_read(self, model, **hints):
+        if not self._routed(model) or not settings.NEWS_DB_REPLICAS:
+            return None
+        if _use_primary.get() or connections['default'].in_atomic_block:
+            # Внутри транзакции читаем то, что в ней же и записали.
+            return 'default'
+        return random.choice(settings.NEWS_DB_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return 'default' if self._routed(model) else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.NEWS_DB_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики — копии основной БД, миграции применяются только к ней.
+        if db in settings.NEWS_DB_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Направляет чтение в основную БД для изменяющих запросов и ещё
+    NEWS_REPLICA_STICKY_SECONDS секунд после них (по куке клиента).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unsafe = request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+        token = _use_primary.set(unsafe or STICKY_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        if unsafe and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.NEWS_REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
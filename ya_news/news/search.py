@@ -0,0 +1,127 @@
+"""
+Полнотекстовый поиск по новостям на SQLite FTS5.
+
+Индекс — виртуальная таблица news_news_fts, в которой rowid совпадает
+с pk новости. Он обновляется сигналами при каждом сохранении и удалении
+новости; после массовой загрузки (bulk_create, update) индекс
+пересобирается командой rebuild_search_index.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import News
+
+FTS_TABLE = 'news_news_fts'
+INDEXED_FIELDS = ('title', 'text')
+WORD_RE = re.compile(r'\w+')
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """
+    Запрос FTS5 из пользовательской строки.
+
+    Спецсимволы синтаксиса FTS5 отбрасываются, каждое слово ищется
+    как префикс, все слова должны встретиться в новости.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(query.lower()))
+
+
+def index_news(news):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [news.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            [news.pk, news.title, news.text],
+        )
+
+
+def unindex_news(pk):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild_index():
+    """Заново заполняет индекс по всем новостям; возвращает их число."""
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            'SELECT id, title, text FROM news_news'
+        )
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+class SearchResults:
+    """
+    Ранжированные результаты поиска с ленивой загрузкой страниц.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator:
+    из индекса читаются только pk нужной страницы, а сами объекты
+    загружаются одним запросом из queryset.
+    """
+
+    def __init__(self, match, queryset):
+        self.match = match
+        self.queryset = queryset
+        self.model = queryset.model
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        limit = -1 if item.stop is None else max(item.stop - start, 0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, limit, start],
+            )
+            pks = [row[0] for row in cursor.fetchall()]
+        objects = self.queryset.in_bulk(pks)
+        return [objects[pk] for pk in pks if pk in objects]
+
+
+def search_news(query, queryset=None):
+    """
+    Новости, подходящие под запрос, от самых релевантных.
+
+    На других СУБД (без FTS5) откатывается к icontains.
+    """
+    if queryset is None:
+        queryset = News.objects.all()
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+    if not is_supported():
+        condition = Q()
+        for word in WORD_RE.findall(query):
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        return queryset.filter(condition)
+    return SearchResults(match, queryset)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_news
+from .models import Comment, News
+from .search import index_news, unindex_news
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_cache(sender, instance, **kwargs):
+    """Изменилась новость: сбрасываем её карточку и главную страницу."""
+    invalidate_news(instance.pk)
+
+
+@receiver(post_save, sender=News)
+def update_search_index(sender, instance, **kwargs):
+    index_news(instance)
+
+
+@receiver(post_delete, sender=News)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_news(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_cache(sender, instance, **kwargs):
+    """Изменился комментарий: меняется счётчик на карточке новости."""
+    invalidate_news(instance.news_id)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
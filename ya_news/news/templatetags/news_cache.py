@@ -0,0 +1,20 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from news.cache import cache_get, cache_set, news_card_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def news_card(news):
+    """Карточка новости для главной страницы, закешированная по pk."""
+    key = news_card_key(news)
+    card = cache_get(key)
+    if card is None:
+        card = render_to_string(
+            'news/includes/news_card.html', {'news': news}
+        )
+        cache_set(key, card)
+    return mark_safe(card)
@@ -1,16 +1,46 @@
 from django.urls import path
 
-from news import views
+from news import api, async_views, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
+    path('archive/', views.NewsArchive.as_view(), name='archive'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('export/', views.NewsExport.as_view(), name='export'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.NewsListApi.as_view(), name='api_list'),
+    path(
+        'api/news/<int:pk>/',
+        api.NewsDetailApi.as_view(),
+        name='api_detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.NewsCommentsApi.as_view(),
+        name='api_comments'
+    ),
+    path('async/', async_views.news_list, name='async_home'),
+    path(
+        'async/news/<int:pk>/',
+        async_views.news_detail,
+        name='async_detail'
+    ),
+    path(
+        'async/news/<int:pk>/comments/',
+        async_views.news_comments,
+        name='async_comments'
+    ),
 ]
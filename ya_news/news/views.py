@@ -1,39 +1,154 @@
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.db import transaction
+from django.http import (
+    Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+)
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.views import generic
 
+from .cache import (
+    HOME_PAGE_KEY, cache_get, cache_set, cache_stats, page_key
+)
+from .counters import comment_added, comment_removed
+from .conditional import (
+    ConditionalGetMixin, NewsValidatorsMixin, home_state, home_validators,
+    user_state
+)
+from .export import FORMATS, export_news
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import KeysetPaginationMixin, paginate_keyset
+from .search import search_news
 
+COMMENTS_ORDERING = ('created', 'pk')
 
-class NewsList(generic.ListView):
+
+class AnonymousPageCacheMixin:
+    """Анонимным пользователям отдаёт страницу из кеша."""
+    page_cache_key = None
+
+    def get_page_cache_key(self):
+        return page_key(self.page_cache_key)
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = self.get_page_cache_key()
+        content = cache_get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda response: cache_set(key, response.content)
+        )
+        return response
+
+
+class NewsList(
+        ConditionalGetMixin, AnonymousPageCacheMixin, generic.ListView
+):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    page_cache_key = HOME_PAGE_KEY
+    cache_max_age = settings.NEWS_HTTP_CACHE_MAX_AGE
 
-    def get_queryset(self):
+    @cached_property
+    def home_news(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев хранится в самой новости: комментарии
+        на главной странице не загружаются и не подсчитываются.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    @cached_property
+    def home_state(self):
+        # Загружает новости страницы: отрисовка берёт их из того же
+        # queryset без повторного запроса.
+        return home_state(self.home_news)
+
+    def get_validators(self):
+        return home_validators(self.request, self.home_state)
+
+    def get_page_cache_key(self):
+        return page_key(self.page_cache_key, self.home_state)
+
+    def get_queryset(self):
+        return self.home_news
 
 
-class NewsDetail(generic.DetailView):
+class NewsArchive(KeysetPaginationMixin, generic.ListView):
+    """
+    Архив всех новостей с курсорной пагинацией.
+
+    Страницы листаются по индексу (date, id), поэтому глубокие страницы
+    стоят столько же, сколько первая.
+    """
     model = News
-    template_name = 'news/detail.html'
+    template_name = 'news/archive.html'
+    paginate_by = settings.NEWS_COUNT_ON_ARCHIVE_PAGE
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+
+class NewsSearch(generic.ListView):
+    """Поиск по новостям, результаты упорядочены по релевантности."""
+    model = News
+    template_name = 'news/search.html'
+    paginate_by = settings.NEWS_COUNT_ON_SEARCH_PAGE
+
+    def get_queryset(self):
+        return search_news(
+            self.request.GET.get('q', ''),
+            self.model.objects.all(),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+def get_comments(news_pk):
+    """Комментарии к новости вместе с авторами — одним запросом."""
+    return Comment.objects.filter(
+        news_id=news_pk, flagged=False
+    ).select_related('author')
+
+
+class CommentsPageMixin:
+    """Добавляет в контекст первую страницу комментариев к новости."""
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments_page'] = paginate_keyset(
+            get_comments(self.object.pk),
+            COMMENTS_ORDERING,
+            settings.COMMENTS_COUNT_ON_NEWS_PAGE,
         )
-        return obj
+        return context
+
+
+class NewsDetail(
+        NewsValidatorsMixin,
+        ConditionalGetMixin,
+        CommentsPageMixin,
+        generic.DetailView
+):
+    model = News
+    template_name = 'news/detail.html'
+    cache_max_age = settings.NEWS_HTTP_CACHE_MAX_AGE
+
+    def get_etag_parts(self):
+        return (*super().get_etag_parts(), user_state(self.request))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,8 +157,24 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class NewsComments(KeysetPaginationMixin, generic.ListView):
+    """Следующая страница комментариев к новости в виде HTML-фрагмента."""
+    template_name = 'news/includes/comments.html'
+    keyset_ordering = COMMENTS_ORDERING
+    paginate_by = settings.COMMENTS_COUNT_ON_NEWS_PAGE
+
+    def get_queryset(self):
+        return get_comments(self.kwargs['pk'])
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['news_pk'] = self.kwargs['pk']
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,7 +190,9 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            comment_added(comment)
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -83,14 +216,16 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        # Заголовок новости выводится на страницах правки и удаления.
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +237,54 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        with transaction.atomic():
+            response = super().delete(request, *args, **kwargs)
+            comment_removed(self.object)
+        return response
+
+
+class NewsExport(UserPassesTestMixin, generic.View):
+    """
+    Потоковая выгрузка всех новостей и комментариев.
+
+    Параметры: format=ndjson|csv и gzip=1 для сжатия.
+    Доступна только сотрудникам.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'ndjson')
+        if export_format not in FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        compress = request.GET.get('gzip') == '1'
+        filename = f'news.{export_format}'
+        content_type = FORMATS[export_format]
+        if compress:
+            filename += '.gz'
+            content_type = 'application/gzip'
+        response = StreamingHttpResponse(
+            export_news(export_format, compress), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+
+class CacheStats(UserPassesTestMixin, generic.View):
+    """
+    Попадания и промахи кеша страниц и карточек.
+
+    Счётчики хранятся в кеше NEWS_CACHE_ALIAS: при locmem — свои
+    у каждого процесса, поэтому их отдаёт сам обслуживающий процесс.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(cache_stats())
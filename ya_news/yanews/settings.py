@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -26,8 +27,10 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'news.routers.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'news.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
@@ -54,10 +57,64 @@ WSGI_APPLICATION = 'yanews.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('YANEWS_DB_PATH', BASE_DIR / 'db.sqlite3'),
+        # Файл тестовой БД; по умолчанию она создаётся в памяти.
+        # parallel_tests.py даёт каждому потоку свою копию шаблона.
+        'TEST': {'NAME': os.getenv('YANEWS_TEST_DB')},
     }
 }
 
+# Профиль БД. 'production' включает постоянные соединения и настройки
+# SQLite для одновременных запросов: журнал WAL, synchronous=NORMAL,
+# отображение файла в память, больший кеш страниц и ожидание блокировки
+# вместо ошибки «database is locked». PRAGMA применяются к каждому новому
+# соединению обработчиком сигнала connection_created.
+DATABASE_PROFILE = os.getenv('YANEWS_DB_PROFILE', 'default')
+SQLITE_PRAGMAS = {}
+if DATABASE_PROFILE == 'production':
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 2**20,
+        # Отрицательное значение — размер в КиБ, то есть 64 МиБ.
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+    }
+
+# Реплики только для чтения: пути к файлам SQLite через запятую
+# в YANEWS_DB_REPLICAS (локально их обновляет команда sync_replicas).
+# Маршрутизатор отправляет на них чтение моделей приложения news;
+# после изменяющего запроса клиент NEWS_REPLICA_STICKY_SECONDS секунд
+# читает с основной БД, чтобы сразу увидеть свои изменения.
+NEWS_DB_REPLICAS = []
+for index, path in enumerate(
+    filter(None, os.getenv('YANEWS_DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    NEWS_DB_REPLICAS.append(f'replica{index}')
+DATABASE_ROUTERS = ['news.routers.ReplicaRouter']
+NEWS_REPLICA_STICKY_SECONDS = 10
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yanews',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.getenv('YANEWS_CACHE_BACKEND', 'locmem')],
+}
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +137,32 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+NEWS_COUNT_ON_ARCHIVE_PAGE = 10
+NEWS_COUNT_ON_SEARCH_PAGE = 10
+COMMENTS_COUNT_ON_NEWS_PAGE = 20
+
+# Словарь запрещённых в комментариях слов: по слову на строку.
+# Если не задан, используется news.moderation.BAD_WORDS.
+NEWS_BAD_WORDS_FILE = os.getenv('YANEWS_BAD_WORDS_FILE')
+
+NEWS_CACHE_ALIAS = 'default'
+NEWS_CACHE_TIMEOUT = 60 * 15
+# Сколько секунд общие кеши (обратный прокси) могут отдавать страницы
+# анонимам без перепроверки.
+NEWS_HTTP_CACHE_MAX_AGE = 60
+
+# Размер пула потоков, в котором асинхронные представления выполняют
+# запросы к БД (news.aio).
+NEWS_DB_THREADS = 4
+
+# Выборочное профилирование запросов: доля профилируемых запросов
+# (0 — промежуточный слой не подключается). Профили пишутся в файл
+# NEWS_PROFILE_LOG с ротацией (пустая строка — не писать), последние
+# NEWS_PROFILE_RECENT из них доступны сотрудникам по адресу /profiles/.
+NEWS_PROFILE_SAMPLE_RATE = float(
+    os.getenv('YANEWS_PROFILE_SAMPLE_RATE', '0')
+)
+NEWS_PROFILE_LOG = os.getenv('YANEWS_PROFILE_LOG', BASE_DIR / 'profiles.log')
+NEWS_PROFILE_LOG_MAX_BYTES = 10 * 2**20
+NEWS_PROFILE_LOG_BACKUPS = 5
+NEWS_PROFILE_RECENT = 100
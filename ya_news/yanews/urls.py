@@ -4,9 +4,14 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from news.profiling import RecentProfiles
+from news.views import CacheStats
+
 urlpatterns = [
     path('', include('news.urls')),
     path('admin/', admin.site.urls),
+    path('profiles/', RecentProfiles.as_view(), name='profiles'),
+    path('cache-stats/', CacheStats.as_view(), name='cache_stats'),
 ]
 
 auth_urls = ([
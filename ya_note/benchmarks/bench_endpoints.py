@@ -0,0 +1,121 @@
+"""
+Замер всех маршрутов notes через тестовый клиент Django.
+
+Для каждого маршрута — запросов в секунду, задержка p50/p95/p99,
+число запросов к БД и пик памяти на запрос. Результаты сохраняются
+в JSON и сравниваются с прошлым замером; при регрессии код выхода 1.
+
+Запуск из каталога ya_note:
+    python benchmarks/bench_endpoints.py --notes 10000 --output after.json \
+        --baseline before.json
+"""
+import argparse
+import sys
+
+from common import add_report_arguments, measure_endpoint, report, setup_django
+
+BATCH_SIZE = 5000
+
+
+def seed(notes_count, pool_size):
+    """Заметки автора и запас заметок для замера удаления."""
+    from django.contrib.auth import get_user_model
+
+    from notes.models import Note
+    from notes.search import rebuild_index
+
+    author = get_user_model().objects.create(username='Автор')
+    rows = [
+        Note(title=f'Заметка {index}', text='Текст заметки.',
+             slug=f'note-{index}', author=author)
+        for index in range(notes_count)
+    ] + [
+        Note(title=f'Удаляемая {index}', text='Текст.',
+             slug=f'delete-{index}', author=author)
+        for index in range(pool_size)
+    ]
+    Note.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    rebuild_index()
+    return author
+
+
+def plan(author):
+    """Маршрут → функция, выполняющая запрос с номером index."""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import Client
+    from django.urls import reverse
+
+    anonymous = Client()
+    client = Client()
+    client.force_login(author)
+    edit = reverse('notes:edit', args=('note-0',))
+
+    def get(client, name, *args, **params):
+        url = reverse(name, args=args)
+        return lambda index: client.get(url, params)
+
+    def import_file(index):
+        lines = ''.join(
+            f'{{"title": "Импорт {index}-{row}", "text": "Текст"}}\n'
+            for row in range(10)
+        )
+        return client.post(reverse('notes:import'), {
+            'format': 'ndjson',
+            'file': SimpleUploadedFile('notes.ndjson', lines.encode()),
+        })
+
+    return {
+        'notes:home': get(anonymous, 'notes:home'),
+        'notes:add': get(client, 'notes:add'),
+        'notes:add POST': lambda index: client.post(
+            reverse('notes:add'), {'title': f'Новая {index}', 'text': 'Текст'}
+        ),
+        'notes:edit': get(client, 'notes:edit', 'note-0'),
+        'notes:edit POST': lambda index: client.post(
+            edit, {'title': 'Заметка 0', 'text': f'Текст {index}',
+                   'slug': 'note-0'}
+        ),
+        'notes:detail': get(client, 'notes:detail', 'note-0'),
+        'notes:delete': get(client, 'notes:delete', 'note-0'),
+        'notes:delete POST': lambda index: client.post(
+            reverse('notes:delete', args=(f'delete-{index}',))
+        ),
+        'notes:list': get(client, 'notes:list'),
+        'notes:search': get(client, 'notes:search', q='заметка'),
+        'notes:export': get(client, 'notes:export'),
+        'notes:import': import_file,
+        'notes:success': get(client, 'notes:success'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--notes', type=int, default=1000)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from notes import urls
+
+    routes = plan(seed(args.notes, args.warmup + args.requests + args.probes))
+    missing = {
+        f'notes:{pattern.name}' for pattern in urls.urlpatterns
+    } - {name.split()[0] for name in routes}
+    if missing:
+        parser.error(f'нет замера для маршрутов: {", ".join(sorted(missing))}')
+    results = {}
+    for name, send in routes.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure_endpoint(
+            send, args.requests, args.warmup, args.probes,
+            lambda: CaptureQueriesContext(connection),
+        )
+    return report(args, {'notes': args.notes}, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
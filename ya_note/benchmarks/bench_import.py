@@ -0,0 +1,51 @@
+"""
+Импорт заметок: Note.save по одной против import_notes пачками.
+
+Запуск из каталога ya_note:
+    python benchmarks/bench_import.py --rows 100000
+"""
+import argparse
+import random
+import time
+
+from common import setup_django
+from bench_slugify import make_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--save-rows', type=int, default=5_000,
+                        help='сколько строк сохранить по одной')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+
+    from notes.importer import import_notes
+    from notes.models import Note
+
+    author = get_user_model().objects.create(username='bench')
+    titles = make_corpus(random.Random(42), args.rows, args.rows // 10)
+
+    with transaction.atomic():
+        start = time.perf_counter()
+        for title in titles[:args.save_rows]:
+            Note.objects.create(title=title, text='Текст', author=author)
+        save_rate = args.save_rows / (time.perf_counter() - start)
+        transaction.set_rollback(True)
+
+    result = import_notes(
+        ({'title': title, 'text': 'Текст'} for title in titles),
+        author,
+        args.batch_size,
+    )
+    print(f'Note.save по одной: {save_rate:.0f} строк/с')
+    print(f'import_notes:       {result.rows_per_second:.0f} строк/с '
+          f'({result.created} заметок за {result.seconds:.1f} с)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Транслитерация заголовков заметок: slugify из pytils против
+slugify_title с LRU-кешем.
+
+Запуск из каталога ya_note:
+    python benchmarks/bench_slugify.py --titles 100000
+"""
+import argparse
+import random
+import time
+
+from common import setup_django
+
+WORDS = (
+    'список', 'покупок', 'встреча', 'с', 'командой', 'идеи', 'для',
+    'проекта', 'заметки', 'по', 'лекции', 'план', 'на', 'неделю',
+    'рецепт', 'борща', 'книги', 'прочитать', 'отчёт', 'созвон',
+    'задачи', 'отпуск', 'подарки', 'ремонт', 'дача', 'тренировка',
+)
+
+
+def make_corpus(rng, size, distinct):
+    """
+    Заголовки с распределением, близким к реальному: немногие
+    («Список покупок», «План на неделю») встречаются постоянно.
+    """
+    titles = [
+        ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+        .capitalize()
+        for _ in range(distinct)
+    ]
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    return rng.choices(titles, weights=weights, k=size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=100_000)
+    parser.add_argument('--distinct', type=int, default=5_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from pytils.translit import slugify
+
+    from notes.models import Note
+    from notes.slugs import slug_cache_info, slugify_title
+
+    max_length = Note._meta.get_field('slug').max_length
+    corpus = make_corpus(random.Random(42), args.titles, args.distinct)
+
+    start = time.perf_counter()
+    plain = [slugify(title)[:max_length] for title in corpus]
+    plain_time = time.perf_counter() - start
+
+    slugify_title.cache_clear()
+    start = time.perf_counter()
+    cached = [slugify_title(title, max_length) for title in corpus]
+    cached_time = time.perf_counter() - start
+
+    assert plain == cached
+    info = slug_cache_info()
+    print(f'заголовков: {args.titles}, различных: {args.distinct}')
+    print(f'slugify:       {plain_time:.2f} с')
+    print(f'slugify_title: {cached_time:.2f} с '
+          f'(попаданий {info.hits}, промахов {info.misses}, '
+          f'в кеше {info.currsize}/{info.maxsize})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Условные GET-запросы: ETag, Last-Modified и Cache-Control.
+
+В отличие от декоратора django.views.decorators.http.condition, оба
+валидатора вычисляются одним вызовом get_validators().
+"""
+import hashlib
+from calendar import timegm
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.middleware.csrf import get_token
+from django.template import engines
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+    quote_etag
+)
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Короткий ETag из значений, от которых зависит ответ."""
+    raw = '|'.join(str(part) for part in parts).encode()
+    return quote_etag(hashlib.md5(raw).hexdigest())
+
+
+@lru_cache(maxsize=None)
+def templates_mtime():
+    """
+    Время последнего изменения файлов шаблонов.
+
+    Считается один раз на процесс: после выкладки процессы
+    перезапускаются.
+    """
+    return max((
+        path.stat().st_mtime_ns
+        for engine in engines.all()
+        for directory in engine.template_dirs
+        for path in Path(directory).rglob('*')
+        if path.is_file()
+    ), default=0)
+
+
+def release():
+    """Метка выкладки: NOTES_RELEASE или время изменения шаблонов."""
+    return settings.NOTES_RELEASE or templates_mtime()
+
+
+def user_state(request):
+    """
+    Часть ETag, зависящая от пользователя.
+
+    У авторизованного в страницу попадают его имя и CSRF-токен,
+    поэтому чужая или устаревшая копия не должна совпасть по ETag.
+    """
+    if not request.user.is_authenticated:
+        return 'anonymous'
+    # get_token() гарантирует, что значение CSRF-куки уже выбрано:
+    # иначе первый ответ и повторный запрос дали бы разные ETag.
+    get_token(request)
+    return (
+        request.user.pk,
+        request.user.get_username(),
+        request.META['CSRF_COOKIE'],
+    )
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304 Not Modified, не вызывая основной обработчик GET.
+
+    Наследник реализует get_validators() и возвращает пару
+    (etag, last_modified); любой из валидаторов может быть None.
+    Если задан cache_max_age, ответ анониму может храниться в общих
+    кешах столько секунд, а ответ пользователю — только в его браузере
+    и с обязательной перепроверкой.
+    """
+    cache_max_age = None
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        timestamp = (
+            timegm(last_modified.utctimetuple()) if last_modified else None
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if etag and not response.has_header('ETag'):
+            response['ETag'] = etag
+        if timestamp and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(timestamp)
+        self.patch_cache_headers(response)
+        return response
+
+    def patch_cache_headers(self, response):
+        if self.cache_max_age is None:
+            return
+        if self.request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=self.cache_max_age
+            )
+        patch_vary_headers(response, ('Cookie',))
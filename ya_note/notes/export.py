@@ -0,0 +1,93 @@
+"""
+Потоковая выгрузка заметок в NDJSON и CSV.
+
+Строки читаются через QuerySet.iterator() и сразу превращаются в куски
+текста, поэтому расход памяти не зависит от объёма выгрузки.
+"""
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+NOTE_FIELDS = ('id', 'title', 'text', 'slug', 'author_id')
+# Размер куска, которым отдаётся выгрузка: меньше — больше накладных
+# расходов на каждый кусок, больше — больше памяти на запрос.
+BUFFER_SIZE = 64 * 1024
+
+
+def iter_records(queryset, chunk_size=2000):
+    """Заметки из queryset в порядке pk."""
+    notes = queryset.order_by('pk').values(*NOTE_FIELDS)
+    yield from notes.iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _buffered(lines):
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def render_ndjson(records):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    return _buffered(encoder.encode(record) + '\n' for record in records)
+
+
+def render_csv(records, columns):
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(columns)
+        for record in records:
+            yield writer.writerow(
+                [record.get(column, '') for column in columns]
+            )
+
+    return _buffered(lines())
+
+
+def gzip_stream(chunks):
+    """Сжимает поток текстовых кусков в gzip, не накапливая его целиком."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(records, export_format, columns, compress=False):
+    """Куски выгрузки: str без сжатия и bytes при compress=True."""
+    if export_format == 'csv':
+        chunks = render_csv(records, columns)
+    else:
+        chunks = render_ndjson(records)
+    if compress:
+        return gzip_stream(chunks)
+    return chunks
+
+
+def export_notes(queryset, export_format='ndjson', compress=False,
+                 chunk_size=2000):
+    return export_stream(
+        iter_records(queryset, chunk_size), export_format, NOTE_FIELDS,
+        compress,
+    )
@@ -0,0 +1,180 @@
+"""
+Массовый импорт заметок из NDJSON и CSV.
+
+Записи обрабатываются пачками: slug для всей пачки подбираются в памяти
+по списку занятых, полученному одним запросом, после чего пачка
+записывается одним bulk_create в транзакции. Подобранные slug совпадают
+с теми, что выдал бы Note.save при сохранении записей по одной.
+Если параллельный запрос успел занять один из них, пачка собирается
+заново (как и в Note.save, до SLUG_ATTEMPTS раз).
+"""
+import codecs
+import csv
+import json
+import time
+from collections import namedtuple
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import SLUG_ATTEMPTS, Note
+from .search import index_slugs
+from .slugs import next_free_slug, slugify_title, taken_slugs
+
+FORMATS = ('ndjson', 'csv')
+
+ImportResult = namedtuple(
+    'ImportResult', ('created', 'errors', 'seconds', 'rows_per_second')
+)
+
+
+def is_utf8(chunks):
+    """Проверяет, что байты из chunks — корректный UTF-8."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for chunk in chunks:
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def read_records(lines, import_format):
+    """
+    Словари с полями title, text и необязательным slug.
+
+    Вместо нечитаемой записи выдаётся ValidationError: она попадёт
+    в ошибки под своим номером, а импорт продолжится.
+    """
+    if import_format == 'csv':
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                yield next(reader)
+            except StopIteration:
+                return
+            except csv.Error as error:
+                yield ValidationError(f'Некорректная строка CSV: {error}')
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield ValidationError('Некорректный JSON.')
+
+
+def _batches(records, batch_size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _build_notes(batch, first_line, author, max_length, hints):
+    """
+    Заметки со slug, подобранными для пачки, и ошибки по номерам
+    записей (начиная с first_line).
+    """
+    notes = []
+    errors = []
+    for line, record in enumerate(batch, start=first_line):
+        if isinstance(record, ValidationError):
+            errors.append((line, record.messages))
+            continue
+        if not isinstance(record, dict):
+            errors.append((line, ['Запись должна быть объектом JSON.']))
+            continue
+        note = Note(
+            title=record.get('title') or '',
+            text=record.get('text') or '',
+            slug=record.get('slug') or '',
+            author=author,
+        )
+        try:
+            note.full_clean(exclude=('author',), validate_unique=False)
+        except ValidationError as error:
+            errors.append((line, error.messages))
+            continue
+        notes.append((line, note))
+    taken = taken_slugs(
+        Note,
+        [slugify_title(note.title, max_length)
+         for _, note in notes if not note.slug],
+        max_length,
+        exact=[note.slug for _, note in notes if note.slug],
+    )
+    result = []
+    for line, note in notes:
+        if note.slug:
+            if note.slug in taken:
+                errors.append((line, [f'slug {note.slug} уже занят']))
+                continue
+        else:
+            note.slug = next_free_slug(
+                slugify_title(note.title, max_length), taken, max_length,
+                hints,
+            )
+        taken.add(note.slug)
+        result.append(note)
+    return result, sorted(errors)
+
+
+def _import_batch(batch, first_line, author, max_length, hints, batch_size):
+    """
+    Записывает пачку и возвращает созданные заметки и ошибки.
+
+    Если slug заняли между выборкой занятых и bulk_create, пачка
+    собирается заново; после SLUG_ATTEMPTS неудач все её записи
+    считаются ошибочными.
+    """
+    for _ in range(SLUG_ATTEMPTS):
+        # Номера, выданные откатившейся попыткой, остаются свободными.
+        attempt_hints = dict(hints)
+        try:
+            with transaction.atomic():
+                notes, errors = _build_notes(
+                    batch, first_line, author, max_length, attempt_hints
+                )
+                Note.objects.bulk_create(notes, batch_size=batch_size)
+                # bulk_create не отправляет сигналы: индекс обновляем сами.
+                index_slugs([note.slug for note in notes])
+        except IntegrityError:
+            continue
+        hints.update(attempt_hints)
+        return notes, errors
+    message = ['slug заняты параллельной загрузкой, записи не сохранены']
+    return [], [
+        (line, message)
+        for line in range(first_line, first_line + len(batch))
+    ]
+
+
+def import_notes(records, author, batch_size=500):
+    """
+    Создаёт заметки author из записей пачками по batch_size.
+
+    Каждая пачка записывается в отдельной транзакции, так что при сбое
+    уже загруженные пачки остаются в БД.
+    """
+    max_length = Note._meta.get_field('slug').max_length
+    created = 0
+    errors = []
+    started = time.perf_counter()
+    line = 1
+    hints = {}
+    for batch in _batches(records, batch_size):
+        notes, batch_errors = _import_batch(
+            batch, line, author, max_length, hints, batch_size
+        )
+        created += len(notes)
+        errors.extend(batch_errors)
+        line += len(batch)
+    seconds = time.perf_counter() - started
+    return ImportResult(
+        created, errors, seconds, created / seconds if seconds else 0.0
+    )
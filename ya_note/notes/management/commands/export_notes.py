@@ -0,0 +1,55 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.export import FORMATS, export_notes
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает заметки в NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--author',
+            help='Имя пользователя; без него выгружаются все заметки.',
+        )
+        parser.add_argument(
+            '--format', choices=tuple(FORMATS), default='ndjson',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжать выгрузку gzip.',
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки; по умолчанию — стандартный вывод.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        queryset = Note.objects.all()
+        if options['author']:
+            User = get_user_model()
+            try:
+                author = User.objects.get(username=options['author'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.'
+                )
+            # То же правило, что и в NoteBase.get_queryset.
+            queryset = queryset.filter(author=author)
+        chunks = export_notes(
+            queryset, options['format'], options['gzip'],
+            options['chunk_size'],
+        )
+        if options['output'] == '-':
+            output = sys.stdout.buffer
+        else:
+            output = open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk if options['gzip'] else chunk.encode())
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
@@ -0,0 +1,48 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.importer import FORMATS, import_notes, read_records
+
+
+class Command(BaseCommand):
+    help = 'Массово импортирует заметки пользователя из NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл для импорта; .gz распаковывается на лету.',
+        )
+        parser.add_argument('--author', required=True)
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='По умолчанию определяется по расширению файла.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {options["author"]} не найден.')
+        path = options['path']
+        compressed = path.endswith('.gz')
+        name = path[:-len('.gz')] if compressed else path
+        import_format = options['format'] or (
+            'csv' if name.endswith('.csv') else 'ndjson'
+        )
+        opener = gzip.open if compressed else open
+        with opener(path, 'rt', encoding='utf-8', newline='') as lines:
+            result = import_notes(
+                read_records(lines, import_format),
+                author,
+                options['batch_size'],
+            )
+        for line, messages in result.errors:
+            self.stderr.write(f'Строка {line}: {"; ".join(messages)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано заметок: {result.created}, ошибок: '
+            f'{len(result.errors)}, за {result.seconds:.2f} с '
+            f'({result.rows_per_second:.0f} строк/с).'
+        ))
@@ -0,0 +1,30 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную БД SQLite в файлы реплик из NOTES_DB_REPLICAS. '
+        'Заменяет репликацию при локальном запуске.'
+    )
+
+    def handle(self, *args, **options):
+        source = connections['default']
+        if source.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        source.ensure_connection()
+        for alias in settings.NOTES_DB_REPLICAS:
+            connections[alias].close()
+            target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+            try:
+                # Онлайн-копия: писатели основной БД не блокируются.
+                source.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: скопировано.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено реплик: {len(settings.NOTES_DB_REPLICAS)}.'
+        ))
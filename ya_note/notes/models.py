@@ -1,7 +1,11 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import allocate_slug
+
+# Сколько раз подбирать slug заново, если параллельный запрос успел
+# занять выбранный.
+SLUG_ATTEMPTS = 5
 
 
 class Note(models.Model):
@@ -28,11 +32,36 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Если slug не указан, подбирает свободный по заголовку.
+
+        Совпадение с заметкой, сохранённой параллельно, обнаруживается
+        по IntegrityError: тогда slug подбирается заново.
+        """
+        auto_slug = not self.slug
+        max_slug_length = self._meta.get_field('slug').max_length
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            if auto_slug:
+                self.slug = allocate_slug(
+                    Note.objects.exclude(pk=self.pk),
+                    self.title,
+                    max_slug_length,
+                )
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if not auto_slug or attempt == SLUG_ATTEMPTS:
+                    if auto_slug:
+                        self.slug = ''
+                    raise
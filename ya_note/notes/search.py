@@ -0,0 +1,149 @@
+"""
+Полнотекстовый поиск по заметкам на SQLite FTS5.
+
+Индекс — виртуальная таблица notes_note_fts, в которой rowid совпадает
+с pk заметки. Он обновляется сигналами при каждом сохранении и удалении
+заметки; после массовой загрузки (bulk_create, update) индекс
+пересобирается командой rebuild_search_index.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = 'notes_note_fts'
+WORD_RE = re.compile(r'\w+')
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """
+    Запрос FTS5 из пользовательской строки.
+
+    Спецсимволы синтаксиса FTS5 отбрасываются, каждое слово ищется
+    как префикс, все слова должны встретиться в заметке.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(query.lower()))
+
+
+def index_note(note):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [note.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            [note.pk, note.title, note.text],
+        )
+
+
+def index_slugs(slugs, batch_size=500):
+    """Добавляет в индекс заметки с указанными slug (после bulk_create)."""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        for index in range(0, len(slugs), batch_size):
+            batch = slugs[index:index + batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+                'SELECT id, title, text FROM notes_note '
+                f'WHERE slug IN ({placeholders})',
+                batch,
+            )
+
+
+def unindex_note(pk):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild_index():
+    """Заново заполняет индекс по всем заметкам; возвращает их число."""
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            'SELECT id, title, text FROM notes_note'
+        )
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+class SearchResults:
+    """
+    Ранжированные результаты поиска по заметкам одного автора.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator:
+    из индекса читаются только pk нужной страницы, а сами объекты
+    загружаются одним запросом из queryset.
+    """
+
+    def __init__(self, match, queryset, author_id):
+        self.match = match
+        self.queryset = queryset
+        self.model = queryset.model
+        self.author_id = author_id
+
+    # Ограничение по автору проверяется в SQL, чтобы чужие заметки
+    # не попадали ни в число результатов, ни в LIMIT/OFFSET. CROSS JOIN
+    # закрепляет порядок: сначала индекс, затем заметка по первичному
+    # ключу. С условием rowid IN (...) SQLite выполнял MATCH заново
+    # для каждой заметки автора.
+    _from = (
+        f'FROM {FTS_TABLE} CROSS JOIN notes_note '
+        f'ON notes_note.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s AND notes_note.author_id = %s'
+    )
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) {self._from}',
+                [self.match, self.author_id],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        limit = -1 if item.stop is None else max(item.stop - start, 0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {FTS_TABLE}.rowid {self._from} '
+                f'ORDER BY {FTS_TABLE}.rank LIMIT %s OFFSET %s',
+                [self.match, self.author_id, limit, start],
+            )
+            pks = [row[0] for row in cursor.fetchall()]
+        objects = self.queryset.in_bulk(pks)
+        return [objects[pk] for pk in pks if pk in objects]
+
+
+def search_notes(query, queryset, author):
+    """
+    Заметки автора, подходящие под запрос, от самых релевантных.
+
+    На других СУБД (без FTS5) откатывается к icontains.
+    """
+    queryset = queryset.filter(author=author)
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+    if not is_supported():
+        condition = Q()
+        for word in WORD_RE.findall(query):
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        return queryset.filter(condition)
+    return SearchResults(match, queryset, author.pk)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note
+from .search import index_note, unindex_note
+
+
+@receiver(post_save, sender=Note)
+def update_search_index(sender, instance, **kwargs):
+    index_note(instance)
+
+
+@receiver(post_delete, sender=Note)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_note(instance.pk)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению с SQLite."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
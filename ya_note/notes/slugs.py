@@ -0,0 +1,138 @@
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import Q
+from pytils.translit import slugify
+
+# Сколько символов slug оставляем под суффикс вида «-N», когда
+# заголовок слишком длинный.
+SUFFIX_RESERVE = 8
+# Основа slug для заголовка без букв и цифр («!!!»): пустой slug
+# не годится для адреса заметки.
+FALLBACK_SLUG = 'note'
+# Сколько последних заголовков помнит кеш транслитерации.
+SLUG_CACHE_SIZE = 4096
+# Сколько заголовков проверять одним запросом: каждое условие удлиняет
+# цепочку OR, а глубина выражения в SQLite ограничена 1000.
+BASES_PER_QUERY = 500
+
+
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def slugify_title(title, max_length):
+    """
+    Транслитерированный slug заголовка, обрезанный до max_length.
+
+    Заголовки часто повторяются (особенно при импорте), а slugify
+    из pytils заметно дороже поиска в кеше. Если от заголовка ничего
+    не осталось, основой служит FALLBACK_SLUG.
+    """
+    return slugify(title)[:max_length] or FALLBACK_SLUG
+
+
+def slug_cache_info():
+    """Статистика кеша slugify_title: hits, misses, maxsize, currsize."""
+    return slugify_title.cache_info()
+
+
+def next_free_slug(base, taken, max_length, hints=None):
+    """
+    Первый свободный slug из base, base-2, base-3, ...
+
+    hints — необязательный словарь base → номер, с которого продолжать
+    перебор: при массовой загрузке одного заголовка он избавляет
+    от повторного перебора уже занятых номеров.
+    """
+    if base not in taken:
+        return base
+    number = hints.get(base, 2) if hints is not None else 2
+    while True:
+        suffix = f'-{number}'
+        candidate = base[:max_length - len(suffix)] + suffix
+        if candidate not in taken:
+            if hints is not None:
+                hints[base] = number + 1
+            return candidate
+        number += 1
+
+
+def candidate_range(base, max_length):
+    """
+    Где искать занятые варианты slug для base: (точное значение или None,
+    нижняя граница включительно, верхняя граница не включительно).
+
+    Диапазон, а не LIKE, чтобы работал уникальный индекс:
+    «-» в ASCII идёт сразу перед «.», поэтому base-N лежат в [base-, base.).
+    """
+    stem = base[:max_length - SUFFIX_RESERVE]
+    if stem == base:
+        return base, f'{base}-', f'{base}.'
+    # Длинный заголовок: при добавлении суффикса base обрезается, но
+    # все варианты начинаются с stem. «~» больше любого символа slug.
+    return None, stem, f'{stem}~'
+
+
+def candidates_filter(base, max_length):
+    """Условие, под которое попадают все возможные варианты slug для base."""
+    exact, low, high = candidate_range(base, max_length)
+    condition = Q(slug__gte=low, slug__lt=high)
+    if exact is not None:
+        condition |= Q(slug=exact)
+    return condition
+
+
+def allocate_slug(queryset, title, max_length):
+    """
+    Свободный slug для заголовка за один запрос к БД.
+
+    queryset — заметки, с которыми нельзя совпадать (обычно все,
+    кроме сохраняемой).
+    """
+    base = slugify_title(title, max_length)
+    taken = set(
+        queryset.filter(
+            candidates_filter(base, max_length)
+        ).values_list('slug', flat=True)
+    )
+    return next_free_slug(base, taken, max_length)
+
+
+def taken_slugs(model, bases, max_length, exact=()):
+    """
+    Занятые slug, с которыми могут совпасть варианты для bases, а также
+    занятые из exact — по одному запросу на BASES_PER_QUERY заголовков.
+
+    Запрос собирается вручную: построение Q из сотен условий в ORM
+    занимает больше времени, чем сам запрос.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    bases = sorted(set(bases))
+    exact = set(exact)
+    groups = [
+        bases[index:index + BASES_PER_QUERY]
+        for index in range(0, len(bases), BASES_PER_QUERY)
+    ] or [[]]
+    taken = set()
+    with connection.cursor() as cursor:
+        for number, group in enumerate(groups):
+            values = set(exact) if number == 0 else set()
+            conditions = []
+            params = []
+            for base in group:
+                value, low, high = candidate_range(base, max_length)
+                if value is not None:
+                    values.add(value)
+                conditions.append('(slug >= %s AND slug < %s)')
+                params.extend((low, high))
+            if values:
+                conditions.append(
+                    f'slug IN ({", ".join(["%s"] * len(values))})'
+                )
+                params.extend(sorted(values))
+            if not conditions:
+                continue
+            cursor.execute(
+                f'SELECT slug FROM {table} WHERE {" OR ".join(conditions)}',
+                params,
+            )
+            taken.update(row[0] for row in cursor.fetchall())
+    return taken
@@ -1,9 +1,20 @@
+import os
+from http import HTTPStatus
+from pathlib import Path
+
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from notes.conditional import templates_mtime
 from notes.forms import NoteForm
 from notes.models import Note
+from notes.search import SearchResults, is_supported, search_notes
+from notes.tests.utils import NotesTestCase
 
 
 User = get_user_model()
@@ -56,27 +67,175 @@ class TestNotesPage(TestCase):
         self.assertEqual(notes_count, self.NOTE_COUNT)
 
 
-class TestAddAndEditPage(TestCase):
+class TestNotesPagination(TestCase):
+
+    NOTES_URL = reverse('notes:list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор записи')
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст',
+                author=cls.author,
+                slug=f'note-{index}'
+            )
+            for index in range(settings.NOTES_COUNT_ON_PAGE + 1)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def test_notes_are_paginated(self):
+        """Заметки выводятся постранично в порядке создания."""
+        first_page = self.client.get(self.NOTES_URL).context['object_list']
+        second_page = self.client.get(
+            self.NOTES_URL, {'page': 2}
+        ).context['object_list']
+        self.assertEqual(len(first_page), settings.NOTES_COUNT_ON_PAGE)
+        self.assertEqual(len(second_page), 1)
+        ids = [note.id for note in [*first_page, *second_page]]
+        self.assertEqual(
+            ids, list(Note.objects.order_by('id').values_list('id', flat=True))
+        )
+
+    def test_notes_text_is_not_loaded(self):
+        """Текст заметок для списка из БД не читается."""
+        response = self.client.get(self.NOTES_URL)
+        for note in response.context['object_list']:
+            with self.subTest(note=note.slug):
+                self.assertIn('text', note.get_deferred_fields())
+
+
+class TestNoteSearch(TestCase):
+
+    SEARCH_URL = reverse('notes:search')
 
     @classmethod
     def setUpTestData(cls):
         cls.author = User.objects.create(username='Автор записи')
-        cls.notes = Note.objects.create(
-            title='Новость',
-            text='Текст',
-            author=cls.author
+        cls.reader = User.objects.create(username='Читатель')
+        cls.rare = Note.objects.create(
+            title='Покупки', text='Купить молоко.', author=cls.author
+        )
+        cls.frequent = Note.objects.create(
+            title='Молоко', text='Молоко, снова молоко.', author=cls.author
+        )
+        Note.objects.create(
+            title='Молоко', text='Чужое молоко.', author=cls.reader
         )
 
+    def test_search_returns_ranked_notes_of_author(self):
+        """Поиск находит только свои заметки, самые релевантные — выше."""
+        self.client.force_login(self.author)
+        response = self.client.get(self.SEARCH_URL, {'q': 'молок'})
+        self.assertEqual(
+            list(response.context['object_list']),
+            [self.frequent, self.rare],
+        )
+
+    @skipUnless(is_supported(), 'нужен SQLite с FTS5')
+    def test_search_query_is_author_scoped_join(self):
+        """
+        Чужие заметки не попадают в count; запрос идёт от индекса
+        к заметке по первичному ключу, а не через подзапрос по автору.
+        """
+        results = search_notes('молок', Note.objects.all(), self.author)
+        self.assertEqual(results.count(), 2)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'EXPLAIN QUERY PLAN SELECT count(*) {SearchResults._from}',
+                [results.match, self.author.pk],
+            )
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertEqual(len(plan), 2)
+        self.assertTrue(plan[0].startswith('SCAN notes_note_fts'))
+        self.assertIn('notes_note USING INTEGER PRIMARY KEY', plan[1])
+
+    def test_search_index_follows_changes(self):
+        """Изменённая и удалённая заметки пропадают из результатов."""
+        self.client.force_login(self.author)
+        self.rare.text = 'Купить хлеб.'
+        self.rare.save()
+        self.frequent.delete()
+        response = self.client.get(self.SEARCH_URL, {'q': 'молок'})
+        self.assertEqual(list(response.context['object_list']), [])
+
+
+class TestConditionalGet(NotesTestCase):
+
+    HOME_URL = reverse('notes:home')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.detail_url = reverse('notes:detail', args=(cls.note.slug,))
+
+    def test_home_page_for_anonymous(self):
+        """Аноним получает 304 и публичный Cache-Control."""
+        response = self.client.get(self.HOME_URL)
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.NOTES_HTTP_CACHE_MAX_AGE}',
+        )
+        response = self.client.get(
+            self.HOME_URL, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_home_page_etag_changes_on_release(self):
+        """После выкладки (новая метка или шаблоны) ETag другой."""
+        etag = self.client.get(self.HOME_URL)['ETag']
+        with self.settings(NOTES_RELEASE='2.0'):
+            self.assertNotEqual(self.client.get(self.HOME_URL)['ETag'], etag)
+        template = Path(settings.BASE_DIR) / 'templates' / 'base.html'
+        mtime = template.stat().st_mtime_ns
+        newer = templates_mtime() + 10**9
+        templates_mtime.cache_clear()
+        try:
+            os.utime(template, ns=(mtime, newer))
+            self.assertNotEqual(self.client.get(self.HOME_URL)['ETag'], etag)
+        finally:
+            os.utime(template, ns=(mtime, mtime))
+            templates_mtime.cache_clear()
+
+    def test_home_page_etag_depends_on_user(self):
+        etag = self.client.get(self.HOME_URL)['ETag']
+        response = self.author_client.get(
+            self.HOME_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_note_detail_not_modified_until_changed(self):
+        """Заметка не отрисовывается заново, пока не изменится."""
+        etag = self.author_client.get(self.detail_url)['ETag']
+        with self.assertNumQueries(3):
+            # Сессия, пользователь и сама заметка.
+            response = self.author_client.get(
+                self.detail_url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.note.text = 'Новый текст'
+        self.note.save()
+        response = self.author_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class TestAddAndEditPage(NotesTestCase):
+
     def test_add_and_edit_form(self):
         """На страницах добавления и редактирования есть форма."""
-        self.client.force_login(self.author)
         urls = (
-            ('notes:edit', (self.notes.slug,)),
+            ('notes:edit', (self.note.slug,)),
             ('notes:add', None),
         )
         for name, args in urls:
             with self.subTest(name=name):
                 url = reverse(name, args=args)
-                response = self.client.get(url)
+                response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
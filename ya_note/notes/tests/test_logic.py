@@ -1,10 +1,35 @@
+import csv
+import gzip
+import json
+import tempfile
 from http import HTTPStatus
+from pathlib import Path
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.contrib.sessions.models import Session
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.models.signals import post_save
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+)
 from django.urls import reverse
 
+from notes.forms import WARNING
+from notes.importer import import_notes
 from notes.models import Note
+from notes.profiling import ProfilingMiddleware, recent_profiles
+from notes.routers import (
+    STICKY_COOKIE, ReplicaRouter, ReplicaStickinessMiddleware
+)
+from notes.slugs import (
+    FALLBACK_SLUG, allocate_slug, slug_cache_info, slugify_title, taken_slugs
+)
+from notes.tests.utils import NotesTestCase, _Graph
 
 User = get_user_model()
 
@@ -43,17 +68,80 @@ class TestNoteCreation(TestCase):
         self.assertEqual(note.title, self.expected_title)
         self.assertEqual(note.author, self.user)
 
-    def test_two_identical_slug(self):
-        """Невозможно создать две заметки с одинаковым slug."""
+    def test_two_identical_titles_get_different_slugs(self):
+        """
+        Заметке с уже занятым автоматическим slug
+        подбирается следующий свободный.
+        """
         initial_notes_count = Note.objects.count()
         self.auth_client.post(self.url, data=self.form_data)
-        notes_count_first_attempt = Note.objects.count()
-        self.assertEqual(notes_count_first_attempt,
-                         initial_notes_count + 1)
         self.auth_client.post(self.url, data=self.form_data)
-        notes_count_second_attempt = Note.objects.count()
-        self.assertEqual(notes_count_second_attempt,
-                         initial_notes_count + 1)
+        notes_count = Note.objects.count()
+        self.assertEqual(notes_count, initial_notes_count + 2)
+        slugs = set(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(
+            slugs, {self.expected_slug, f'{self.expected_slug}-2'}
+        )
+
+    def test_two_identical_slug(self):
+        """Невозможно создать две заметки с одинаковым slug."""
+        form_data = {**self.form_data, 'slug': 'slug'}
+        self.auth_client.post(self.url, data=form_data)
+        initial_notes_count = Note.objects.count()
+        response = self.auth_client.post(self.url, data=form_data)
+        self.assertFormError(response, 'form', 'slug', 'slug' + WARNING)
+        notes_count = Note.objects.count()
+        self.assertEqual(notes_count, initial_notes_count)
+
+    def test_title_without_letters_gets_fallback_slug(self):
+        """Заголовок без букв и цифр даёт slug note, note-2, ..."""
+        for title in ('!!!', '???'):
+            self.auth_client.post(
+                self.url, data={**self.form_data, 'title': title}
+            )
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {FALLBACK_SLUG, f'{FALLBACK_SLUG}-2'},
+        )
+        response = self.auth_client.get(reverse('notes:list'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_slug_is_allocated_again_after_collision(self):
+        """
+        Если выбранный slug успели занять параллельно,
+        заметка сохраняется со следующим свободным.
+        """
+        Note.objects.create(
+            title=self.expected_title, text='Текст', author=self.user
+        )
+        with mock.patch(
+            'notes.models.allocate_slug',
+            side_effect=(self.expected_slug, f'{self.expected_slug}-2'),
+        ):
+            note = Note.objects.create(
+                title=self.expected_title, text='Текст', author=self.user
+            )
+        self.assertEqual(note.slug, f'{self.expected_slug}-2')
+
+    def test_slugify_title_is_cached(self):
+        """Повторный заголовок транслитерируется из кеша."""
+        slugify_title.cache_clear()
+        self.assertEqual(slugify_title('Заголовок', 100), 'zagolovok')
+        self.assertEqual(slugify_title('Заголовок', 100), 'zagolovok')
+        self.assertEqual(slugify_title('Заголовок', 5), 'zagol')
+        info = slug_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 2))
+
+    def test_allocate_slug_in_one_query(self):
+        """Свободный slug подбирается одним запросом к БД."""
+        Note.objects.bulk_create(
+            Note(title='Заголовок', text='Текст', author=self.user, slug=slug)
+            for slug in ('zagolovok', 'zagolovok-2', 'zagolovok-x',
+                         'zagolovoka')
+        )
+        with self.assertNumQueries(1):
+            slug = allocate_slug(Note.objects.all(), 'Заголовок', 100)
+        self.assertEqual(slug, 'zagolovok-3')
 
     def test_automatic_creation_slug(self):
         """При создании заметки, если не заполнен slug,"""
@@ -63,21 +151,11 @@ class TestNoteCreation(TestCase):
         self.assertEqual(note.slug, self.expected_slug)
 
 
-class TestNoteEditDelete(TestCase):
+class TestNoteEditDelete(NotesTestCase):
 
     @classmethod
     def setUpTestData(cls):
-        cls.author = User.objects.create(username='Автор комментария')
-        cls.author_client = Client()
-        cls.author_client.force_login(cls.author)
-        cls.reader = User.objects.create(username='Читатель')
-        cls.reader_client = Client()
-        cls.reader_client.force_login(cls.reader)
-        cls.note = Note.objects.create(
-            title='Заголовок',
-            text='Текст',
-            author=cls.author,
-        )
+        super().setUpTestData()
         cls.note_url = reverse('notes:success')
         cls.edit_url = reverse('notes:edit', args=(cls.note.slug,))
         cls.delete_url = reverse('notes:delete', args=(cls.note.slug,))
@@ -116,6 +194,295 @@ class TestNoteEditDelete(TestCase):
         """Пользователь не может редактировать заметку другого пользователя."""
         response = self.reader_client.post(self.edit_url, data=self.form_data)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
-        self.note.refresh_from_db()
-        self.assertEqual(self.note.text, self.expected_text)
-        self.assertEqual(self.note.title, self.expected_title)
+        note = Note.objects.get(pk=self.note.pk)
+        self.assertEqual(note.text, self.note.text)
+        self.assertEqual(note.title, self.note.title)
+
+
+class TestNoteExport(NotesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url = reverse('notes:export')
+        Note.objects.create(title='Чужая', text='Текст', author=cls.reader)
+
+    def test_export_contains_only_own_notes(self):
+        """В выгрузку попадают только заметки пользователя."""
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                response = self.author_client.get(
+                    self.url, {'gzip': '1' if compress else '0'}
+                )
+                content = b''.join(response.streaming_content)
+                if compress:
+                    content = gzip.decompress(content)
+                records = [
+                    json.loads(line)
+                    for line in content.decode().splitlines()
+                ]
+                self.assertEqual(
+                    [record['slug'] for record in records], [self.note.slug]
+                )
+
+    def test_export_command_csv(self):
+        """Команда выгружает заметки автора в CSV."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'notes.csv'
+            call_command(
+                'export_notes', author=self.author.username, format='csv',
+                output=str(output),
+            )
+            with open(output, encoding='utf-8', newline='') as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual([row['slug'] for row in rows], [self.note.slug])
+        self.assertEqual(rows[0]['text'], self.note.text)
+
+
+class TestNoteImport(NotesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url = reverse('notes:import')
+        Note.objects.create(title='Заголовок', text='Текст', author=cls.author)
+
+    def test_import_gives_same_slugs_as_save(self):
+        """Импорт подбирает те же slug, что и сохранение по одной."""
+        titles = ['Заголовок', 'Другой', 'Заголовок', 'Я' * 100, 'Я' * 100]
+        with transaction.atomic():
+            expected = [
+                Note.objects.create(
+                    title=title, text='Текст', author=self.author
+                ).slug
+                for title in titles
+            ]
+            transaction.set_rollback(True)
+        initial_ids = set(Note.objects.values_list('id', flat=True))
+        result = import_notes(
+            ({'title': title, 'text': 'Текст'} for title in titles),
+            self.author,
+            batch_size=2,
+        )
+        self.assertEqual(result.created, len(titles))
+        slugs = list(
+            Note.objects.exclude(id__in=initial_ids)
+            .order_by('id').values_list('slug', flat=True)
+        )
+        self.assertEqual(slugs, expected)
+
+    def test_import_api_reports_errors(self):
+        """API импортирует CSV и сообщает о строках с ошибками."""
+        upload = SimpleUploadedFile(
+            'notes.csv',
+            'title,text,slug\n'
+            'Покупки,Молоко,\n'
+            'Дубль,Текст,zagolovok\n'
+            'Пустая,,\n'.encode(),
+        )
+        response = self.author_client.post(
+            self.url, {'file': upload, 'format': 'csv'}
+        )
+        data = response.json()
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(
+            [error['line'] for error in data['errors']], [2, 3]
+        )
+        self.assertTrue(Note.objects.filter(slug='pokupki').exists())
+
+    def test_import_validates_explicit_slug(self):
+        """Указанный в записи slug проверяется как в форме."""
+        result = import_notes(
+            [{'title': 'Заметка', 'text': 'Текст', 'slug': 'bad slug!'},
+             {'title': 'Заметка', 'text': 'Текст', 'slug': 'a' * 150}],
+            self.author,
+        )
+        self.assertEqual(result.created, 0)
+        self.assertEqual([line for line, _ in result.errors], [1, 2])
+        self.assertEqual(
+            self.author_client.get(reverse('notes:list')).status_code,
+            HTTPStatus.OK,
+        )
+
+    def test_import_retries_slug_taken_concurrently(self):
+        """Slug, занятый параллельно, подбирается заново."""
+        calls = []
+
+        def stale_taken_slugs(*args, **kwargs):
+            # Первая выборка не видит заметку, сохранённую параллельно.
+            calls.append(args)
+            return set() if len(calls) == 1 else taken_slugs(*args, **kwargs)
+
+        with mock.patch('notes.importer.taken_slugs', stale_taken_slugs):
+            result = import_notes(
+                [{'title': 'Заголовок', 'text': 'Текст'}] * 2, self.author
+            )
+        self.assertEqual((result.created, result.errors), (2, []))
+        self.assertEqual(len(calls), 2)
+        # Номера из откатившейся попытки не пропускаются.
+        self.assertEqual(
+            list(Note.objects.filter(slug__startswith='zagolovok-')
+                 .order_by('id').values_list('slug', flat=True)),
+            ['zagolovok-2', 'zagolovok-3'],
+        )
+
+    def test_import_title_without_letters(self):
+        """Импорт и Note.save дают одинаковый slug заголовку без букв."""
+        result = import_notes(
+            [{'title': '!!!', 'text': 'Текст'},
+             {'title': '???', 'text': 'Текст'}],
+            self.author,
+        )
+        self.assertEqual(result.created, 2)
+        note = Note.objects.create(title='...', text='Текст',
+                                   author=self.author)
+        self.assertEqual(
+            list(Note.objects.filter(slug__startswith=FALLBACK_SLUG)
+                 .order_by('id').values_list('slug', flat=True)),
+            [FALLBACK_SLUG, f'{FALLBACK_SLUG}-2', f'{FALLBACK_SLUG}-3'],
+        )
+        self.assertEqual(note.slug, f'{FALLBACK_SLUG}-3')
+
+    def test_import_reports_unreadable_records(self):
+        """Нечитаемые строки попадают в ошибки, остальные импортируются."""
+        upload = SimpleUploadedFile(
+            'notes.ndjson',
+            '{"title": "Первая", "text": "Текст"}\n'
+            'не JSON\n'
+            '["x"]\n'
+            '{"title": "Вторая", "text": "Текст"}\n'.encode(),
+        )
+        response = self.author_client.post(
+            self.url, {'file': upload, 'format': 'ndjson'}
+        )
+        data = response.json()
+        self.assertEqual(data['created'], 2)
+        self.assertEqual(
+            [error['line'] for error in data['errors']], [2, 3]
+        )
+
+    def test_import_rejects_non_utf8_file(self):
+        upload = SimpleUploadedFile(
+            'notes.csv', 'title,text\nПокупки,Молоко\n'.encode('cp1251')
+        )
+        response = self.author_client.post(
+            self.url, {'file': upload, 'format': 'csv'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertFalse(Note.objects.filter(title='Покупки').exists())
+
+    def test_imported_notes_are_searchable(self):
+        """Импортированные заметки сразу попадают в поисковый индекс."""
+        import_notes([{'title': 'Рецепт', 'text': 'Борщ'}], self.author)
+        response = self.author_client.get(
+            reverse('notes:search'), {'q': 'борщ'}
+        )
+        self.assertEqual(
+            [note.slug for note in response.context['object_list']],
+            ['retsept'],
+        )
+
+
+class TestSharedData(NotesTestCase):
+
+    def test_shared_rows_send_post_save(self):
+        """Общие данные восстанавливаются через ORM, с сигналами post_save."""
+        Session.objects.all().delete()
+        Note.objects.all().delete()
+        User.objects.all().delete()
+        saved = []
+
+        def record(sender, instance, created, **kwargs):
+            saved.append((sender, instance.pk, created))
+
+        post_save.connect(record)
+        try:
+            (author, reader), note, _ = _Graph.build()
+        finally:
+            post_save.disconnect(record)
+        self.assertCountEqual(saved, [
+            (User, author.pk, True),
+            (User, reader.pk, True),
+            (Note, note.pk, True),
+        ])
+
+
+class TestSqliteProfile(TestCase):
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234})
+    def test_pragmas_applied_to_new_connections(self):
+        """PRAGMA из SQLITE_PRAGMAS применяются к новому соединению."""
+        new_connection = connections.create_connection('default')
+        try:
+            with new_connection.cursor() as cursor:
+                cursor.execute('PRAGMA cache_size')
+                self.assertEqual(cursor.fetchone()[0], -1234)
+        finally:
+            new_connection.close()
+
+
+class TestProfiling(NotesTestCase):
+
+    def test_disabled_by_default(self):
+        """При нулевой доле промежуточный слой не подключается."""
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_sampled_request_is_profiled(self):
+        """Профиль заметки попадает в журнал и в последние профили."""
+        url = reverse('notes:detail', args=(self.note.slug,))
+        with tempfile.TemporaryDirectory() as directory:
+            log = Path(directory) / 'profiles.log'
+            with self.settings(NOTES_PROFILE_SAMPLE_RATE=1,
+                               NOTES_PROFILE_LOG=log):
+                recent_profiles.clear()
+                client = Client()
+                client.cookies = self.author_client.cookies
+                client.get(url)
+            data, = recent_profiles
+            self.assertEqual(
+                (data['path'], data['status'], data['queries']),
+                (url, HTTPStatus.OK, 3),
+            )
+            self.assertEqual(data['duplicates'], 0)
+            self.assertIsNotNone(data['view_ms'])
+            self.assertIsNotNone(data['template_ms'])
+            logged = json.loads(log.read_text('utf-8'))
+            self.assertEqual(logged['path'], url)
+
+    def test_recent_profiles_for_staff_only(self):
+        url = reverse('profiles')
+        response = self.author_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.author.is_staff = True
+        self.author.save()
+        response = self.author_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+@override_settings(NOTES_DB_REPLICAS=['replica1'])
+class TestReplicaRouting(SimpleTestCase):
+
+    def test_reads_go_to_replica(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Note), 'replica1')
+        self.assertEqual(router.db_for_write(Note), 'default')
+        self.assertIsNone(router.db_for_read(User))
+
+    def test_author_reads_primary_after_change(self):
+        """После изменяющего запроса заметки читаются с основной БД."""
+        databases = []
+
+        def get_response(request):
+            databases.append(ReplicaRouter().db_for_read(Note))
+            return HttpResponse()
+
+        middleware = ReplicaStickinessMiddleware(get_response)
+        factory = RequestFactory()
+        response = middleware(factory.post('/'))
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        request = factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        middleware(request)
+        middleware(factory.get('/'))
+        self.assertEqual(databases, ['default', 'default', 'replica1'])
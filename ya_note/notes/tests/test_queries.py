@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from notes import urls
+from notes.models import Note
+from notes.tests.utils import QueryBudgetMixin
+
+User = get_user_model()
+
+# Маршрут → (метод, бюджет). Два запроса из бюджета авторизованного
+# пользователя уходят на сессию и самого пользователя.
+BUDGETS = {
+    'notes:home': ('get', 2),
+    'notes:add': ('get', 2),
+    'notes:edit': ('get', 3),
+    'notes:detail': ('get', 3),
+    'notes:delete': ('get', 3),
+    'notes:list': ('get', 4),
+    'notes:search': ('get', 4),
+    'notes:export': ('get', 3),
+    'notes:import': ('post', 7),
+    'notes:success': ('get', 2),
+}
+
+
+class TestQueryBudgets(QueryBudgetMixin, TestCase):
+    """Число запросов не зависит от числа заметок пользователя."""
+
+    SIZES = (1, 25)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = {}
+        for size in cls.SIZES:
+            author = User.objects.create(username=f'Автор {size}')
+            Note.objects.bulk_create(
+                Note(
+                    title=f'Заметка {index}',
+                    text='Текст заметки.',
+                    author=author,
+                    slug=f'note-{size}-{index}',
+                )
+                for index in range(size)
+            )
+            cls.authors[size] = author
+
+    def test_every_route_has_budget(self):
+        names = {f'notes:{pattern.name}' for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(BUDGETS))
+
+    def request(self, client, name, size):
+        method, _ = BUDGETS[name]
+        if name in ('notes:edit', 'notes:detail', 'notes:delete'):
+            url = reverse(name, args=(f'note-{size}-0',))
+        else:
+            url = reverse(name)
+        if method == 'post':
+            lines = ''.join(
+                f'{{"title": "Импорт {index}", "text": "Текст"}}\n'
+                for index in range(size)
+            )
+            upload = SimpleUploadedFile('notes.ndjson', lines.encode())
+            return client.post(url, {'format': 'ndjson', 'file': upload})
+        response = client.get(url, {'q': 'заметка'})
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def test_query_budgets(self):
+        for size, author in self.authors.items():
+            client = Client()
+            client.force_login(author)
+            for name, (_, limit) in BUDGETS.items():
+                with self.subTest(name=name, size=size):
+                    with self.assert_query_budget(limit, name):
+                        response = self.request(client, name, size)
+                    self.assertEqual(response.status_code, 200)
@@ -1,25 +1,15 @@
 from http import HTTPStatus
 
-from django.contrib.auth import get_user_model
-from django.test import TestCase
 from django.urls import reverse
 
-from notes.models import Note
+from notes.tests.utils import NotesTestCase
 
-User = get_user_model()
 
-
-class TestRoutes(TestCase):
+class TestRoutes(NotesTestCase):
 
     @classmethod
     def setUpTestData(cls):
-        cls.author = User.objects.create(username='Автор Автор')
-        cls.reader = User.objects.create(username='Читатель')
-        cls.note = Note.objects.create(
-            title='Заголовок',
-            text='Текст',
-            author=cls.author
-        )
+        super().setUpTestData()
 
         # URLs for testing
         cls.public_urls = (
@@ -31,6 +21,8 @@ class TestRoutes(TestCase):
 
         cls.authorized_urls = (
             ('notes:list', None),
+            ('notes:search', None),
+            ('notes:export', None),
             ('notes:success', None),
             ('notes:add', None),
         )
@@ -54,26 +46,24 @@ class TestRoutes(TestCase):
 
     def test_page_available_for_authorized_user(self):
         """Доступность страниц для авторизованного пользователя."""
-        self.client.force_login(self.author)
         for name, args in self.authorized_urls:
             with self.subTest(name=name):
                 url = reverse(name, args=args)
-                response = self.client.get(url)
+                response = self.author_client.get(url)
                 self.assertEqual(response.status_code, HTTPStatus.OK)
 
     def test_availability_for_edit_delete_detail(self):
         """Доступность страниц редактирования, удаления и деталей"""
         """для авторизованных пользователей."""
         users_statuses = (
-            (self.author, HTTPStatus.OK),
-            (self.reader, HTTPStatus.NOT_FOUND),
+            (self.author, self.author_client, HTTPStatus.OK),
+            (self.reader, self.reader_client, HTTPStatus.NOT_FOUND),
         )
-        for user, status in users_statuses:
-            self.client.force_login(user)
+        for user, client, status in users_statuses:
             for name, args in self.edit_delete_detail_urls:
                 with self.subTest(user=user, name=name):
                     url = reverse(name, args=args)
-                    response = self.client.get(url)
+                    response = client.get(url)
                     self.assertEqual(response.status_code, status)
 
     def test_redirect_for_anonymous_client(self):
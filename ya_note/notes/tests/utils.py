@@ -0,0 +1,119 @@
+import copy
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+)
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from notes.models import Note
+
+User = get_user_model()
+# Быстрый хешер: надёжность паролей в тестах не нужна.
+FAST_PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class QueryBudgetMixin:
+    """
+    Проверка бюджета запросов к БД для TestCase.
+
+    В отличие от assertNumQueries, запросов может быть и меньше
+    бюджета, а при превышении в сообщение попадает их список.
+    """
+
+    def assert_query_budget(self, limit, label=''):
+        return _QueryBudget(self, limit, label)
+
+
+class _QueryBudget(CaptureQueriesContext):
+
+    def __init__(self, test_case, limit, label):
+        super().__init__(connection)
+        self.test_case = test_case
+        self.limit = limit
+        self.label = label
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None or len(self) <= self.limit:
+            return
+        listing = '\n'.join(
+            f'{number}. {query["sql"]}'
+            for number, query in enumerate(self.captured_queries, 1)
+        )
+        self.test_case.fail(
+            f'{self.label}: {len(self)} запросов при бюджете '
+            f'{self.limit}:\n{listing}'
+        )
+
+
+def _login(user):
+    """Сохранённая сессия пользователя, как после force_login."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session
+
+
+class _Graph:
+    """
+    Автор, читатель, заметка автора и сессии обоих пользователей.
+
+    Пользователи и заметка каждый раз сохраняются через ORM с теми же pk,
+    чтобы срабатывали обработчики post_save. Запоминаются только строки
+    сессий: их сборка и хеширование пароля — самая дорогая часть.
+    """
+    snapshot = None
+
+    @classmethod
+    def build(cls):
+        if cls.snapshot is None:
+            author = User.objects.create(username='Автор')
+            reader = User.objects.create(username='Читатель')
+            note = Note.objects.create(
+                title='Заметка автора', text='Текст', author=author
+            )
+            sessions = [_login(user) for user in (author, reader)]
+            cls.snapshot = (
+                [author, reader],
+                note,
+                [session.model.objects.get(session_key=session.session_key)
+                 for session in sessions],
+            )
+        else:
+            users, note, sessions = copy.deepcopy(cls.snapshot)
+            for obj in (*users, note):
+                obj.save(force_insert=True)
+            type(sessions[0]).objects.bulk_create(sessions)
+        users, note, sessions = copy.deepcopy(cls.snapshot)
+        return users, note, [session.session_key for session in sessions]
+
+
+@override_settings(PASSWORD_HASHERS=FAST_PASSWORD_HASHERS)
+class NotesTestCase(TestCase):
+    """
+    Базовый класс тестов notes с общим набором данных.
+
+    В setUpTestData появляются author, reader, note (заметка автора)
+    и клиенты author_client и reader_client, уже вошедшие в систему:
+    у них сохранённая кука сессии, force_login не вызывается.
+    Наследники, добавляющие свои данные, вызывают super().setUpTestData().
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        (cls.author, cls.reader), cls.note, session_keys = _Graph.build()
+        cls.author_client, cls.reader_client = (
+            cls.client_with_session(key) for key in session_keys
+        )
+
+    @staticmethod
+    def client_with_session(session_key):
+        client = Client()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+        return client
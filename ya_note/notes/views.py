@@ -1,14 +1,35 @@
+import io
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .conditional import (
+    ConditionalGetMixin, make_etag, release, user_state
+)
+from .export import FORMATS, export_notes
+from .forms import WARNING, NoteForm
+from .importer import import_notes, is_utf8, read_records
 from .models import Note
+from .search import search_notes
 
 
-class Home(generic.TemplateView):
+class Home(ConditionalGetMixin, generic.TemplateView):
     """Домашняя страница."""
     template_name = 'notes/home.html'
+    cache_max_age = settings.NOTES_HTTP_CACHE_MAX_AGE
+
+    def get_validators(self):
+        """
+        Страница статична: меняется шапка с пользователем и сами
+        шаблоны при выкладке.
+        """
+        return make_etag(
+            self.template_name, release(), user_state(self.request)
+        ), None
 
 
 class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
@@ -26,22 +47,33 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin:
+    """Общее для создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """
+        Указанный вручную slug мог занять параллельный запрос уже после
+        проверки в форме: показываем ту же ошибку, что и форма.
+        """
+        try:
+            return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', form.cleaned_data['slug'] + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -52,8 +84,123 @@ class NoteDelete(NoteBase, generic.DeleteView):
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    paginate_by = settings.NOTES_COUNT_ON_PAGE
+
+    def get_queryset(self):
+        """
+        Для списка нужны только id, slug и title: текст заметок
+        не читаем. Сортировка по id совпадает с индексом (author, id).
+        """
+        return super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
 
 
-class NoteDetail(NoteBase, generic.DetailView):
+class NoteDetail(NoteBase, ConditionalGetMixin, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+    cache_max_age = settings.NOTES_HTTP_CACHE_MAX_AGE
+
+    def get_validators(self):
+        """
+        У заметки нет даты изменения, поэтому ETag — хеш её полей.
+        Запрос к БД тот же, что нужен для страницы, а шаблон
+        не отрисовывается, если копия клиента актуальна.
+        """
+        note = self.get_object()
+        etag = make_etag(
+            note.pk, note.slug, note.title, note.text,
+            user_state(self.request),
+        )
+        return etag, None
+
+    def get_object(self, queryset=None):
+        if getattr(self, 'object', None) is None:
+            self.object = super().get_object(queryset)
+        return self.object
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+    paginate_by = settings.NOTES_COUNT_ON_PAGE
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.GET.get('q', ''),
+            self.model.objects.only('id', 'slug', 'title'),
+            self.request.user,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NoteExport(NoteBase, generic.View):
+    """
+    Потоковая выгрузка заметок пользователя.
+
+    Параметры: format=ndjson|csv и gzip=1 для сжатия.
+    """
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'ndjson')
+        if export_format not in FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        compress = request.GET.get('gzip') == '1'
+        filename = f'notes.{export_format}'
+        content_type = FORMATS[export_format]
+        if compress:
+            filename += '.gz'
+            content_type = 'application/gzip'
+        response = StreamingHttpResponse(
+            export_notes(self.get_queryset(), export_format, compress),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+
+class NoteImport(NoteBase, generic.View):
+    """
+    Массовый импорт заметок пользователя из файла NDJSON или CSV.
+
+    Файл передаётся в поле file, формат — в поле format.
+    """
+    http_method_names = ('post',)
+
+    def post(self, request, *args, **kwargs):
+        import_format = request.POST.get('format', 'ndjson')
+        upload = request.FILES.get('file')
+        if upload is None or import_format not in FORMATS:
+            return JsonResponse(
+                {'error': 'Нужен файл file в формате ndjson или csv.'},
+                status=400,
+            )
+        # Кодировку проверяем до импорта: иначе ошибка всплыла бы
+        # посреди файла, когда часть пачек уже записана.
+        if not is_utf8(upload.chunks()):
+            return JsonResponse(
+                {'error': 'Файл должен быть в кодировке UTF-8.'},
+                status=400,
+            )
+        upload.seek(0)
+        lines = io.TextIOWrapper(upload, encoding='utf-8', newline='')
+        result = import_notes(
+            read_records(lines, import_format),
+            request.user,
+            settings.NOTES_IMPORT_BATCH_SIZE,
+        )
+        return JsonResponse({
+            'created': result.created,
+            'errors': [
+                {'line': line, 'messages': messages}
+                for line, messages in result.errors
+            ],
+            'seconds': round(result.seconds, 3),
+            'rows_per_second': round(result.rows_per_second, 1),
+        })
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -27,8 +28,10 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'notes.routers.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'notes.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
@@ -55,10 +58,49 @@ WSGI_APPLICATION = 'yanote.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('YANOTE_DB_PATH', BASE_DIR / 'db.sqlite3'),
+        # Файл тестовой БД; по умолчанию она создаётся в памяти.
+        # parallel_tests.py даёт каждому потоку свою копию шаблона.
+        'TEST': {'NAME': os.getenv('YANOTE_TEST_DB')},
     }
 }
 
+# Профиль БД. 'production' включает постоянные соединения и настройки
+# SQLite для одновременных запросов: журнал WAL, synchronous=NORMAL,
+# отображение файла в память, больший кеш страниц и ожидание блокировки
+# вместо ошибки «database is locked». PRAGMA применяются к каждому новому
+# соединению обработчиком сигнала connection_created.
+DATABASE_PROFILE = os.getenv('YANOTE_DB_PROFILE', 'default')
+SQLITE_PRAGMAS = {}
+if DATABASE_PROFILE == 'production':
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 2**20,
+        # Отрицательное значение — размер в КиБ, то есть 64 МиБ.
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+    }
+
+# Реплики только для чтения: пути к файлам SQLite через запятую
+# в YANOTE_DB_REPLICAS (локально их обновляет команда sync_replicas).
+# Маршрутизатор отправляет на них чтение моделей приложения notes;
+# после изменяющего запроса клиент NOTES_REPLICA_STICKY_SECONDS секунд
+# читает с основной БД, чтобы сразу увидеть свои изменения.
+NOTES_DB_REPLICAS = []
+for index, path in enumerate(
+    filter(None, os.getenv('YANOTE_DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    NOTES_DB_REPLICAS.append(f'replica{index}')
+DATABASE_ROUTERS = ['notes.routers.ReplicaRouter']
+NOTES_REPLICA_STICKY_SECONDS = 10
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +129,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 20
+NOTES_IMPORT_BATCH_SIZE = 500
+# Сколько секунд общие кеши (обратный прокси) могут отдавать страницы
+# анонимам без перепроверки.
+NOTES_HTTP_CACHE_MAX_AGE = 60
+# Метка выкладки для ETag статичных страниц; по умолчанию — время
+# последнего изменения файлов шаблонов.
+NOTES_RELEASE = os.getenv('YANOTE_RELEASE', '')
+
+# Выборочное профилирование запросов: доля профилируемых запросов
+# (0 — промежуточный слой не подключается). Профили пишутся в файл
+# NOTES_PROFILE_LOG с ротацией (пустая строка — не писать), последние
+# NOTES_PROFILE_RECENT из них доступны сотрудникам по адресу /profiles/.
+NOTES_PROFILE_SAMPLE_RATE = float(
+    os.getenv('YANOTE_PROFILE_SAMPLE_RATE', '0')
+)
+NOTES_PROFILE_LOG = os.getenv('YANOTE_PROFILE_LOG', BASE_DIR / 'profiles.log')
+NOTES_PROFILE_LOG_MAX_BYTES = 10 * 2**20
+NOTES_PROFILE_LOG_BACKUPS = 5
+NOTES_PROFILE_RECENT = 100
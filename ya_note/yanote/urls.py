@@ -4,9 +4,12 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from notes.profiling import RecentProfiles
+
 urlpatterns = [
     path('', include('notes.urls')),
     path('admin/', admin.site.urls),
+    path('profiles/', RecentProfiles.as_view(), name='profiles'),
 ]
 
 auth_urls = ([